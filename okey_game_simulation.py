@@ -9,14 +9,32 @@ The module provides helper functions to:
 
 Run the module as a script to execute a single simulation.
 """
+import argparse
+import hashlib
+import json
 import logging
+import math
+import mmap
+import multiprocessing
+import os
 import random
-from collections import defaultdict
-from itertools import combinations, product
-from typing import List, Tuple, Dict, Optional
+import sys
+import time
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from itertools import combinations
+from statistics import NormalDist
+from typing import TYPE_CHECKING, Any, Callable, Iterator, List, NamedTuple, Tuple, Dict, Optional, Sequence, Set, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is only needed for the array helpers
+    np = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from numpy.typing import ArrayLike
 
 # Configure logger
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s:%(message)s")
 logger = logging.getLogger(__name__)
 
 # Constants
@@ -28,6 +46,37 @@ FAKE_OKEY_INDEX: int = 52
 # the indicator tile matches this face; otherwise it behaves exactly as this
 # regular tile.
 FAKE_OKEY_FACE_INDEX: int = 0
+# Names accepted by the ``engine`` argument of ``score_hand``.
+SCORING_ENGINES: Tuple[str, ...] = ('search', 'dp', 'decompose', 'anchored')
+# How the seat closest to winning is picked: fewest ungrouped tiles, or
+# fewest tiles to replace (``tiles_to_win``) with ungrouped tiles on ties.
+WINNER_RULES: Tuple[str, ...] = ('leftover', 'distance')
+# Padding value for tile-index arrays holding hands shorter than the row.
+PAD_TILE: int = 255
+# Color names by color id; the fake Okey has color id 4.
+COLOR_NAMES: Tuple[str, ...] = ('yellow', 'blue', 'black', 'red', 'fake')
+
+# Per-tile lookup tables indexed by tile index 0-52.
+TILE_COLOR_IDS: Tuple[int, ...] = tuple(i // 13 for i in range(FAKE_OKEY_INDEX)) + (4,)
+TILE_COLORS: Tuple[str, ...] = tuple(COLOR_NAMES[c] for c in TILE_COLOR_IDS)
+TILE_NUMBERS: Tuple[Optional[int], ...] = tuple(i % 13 + 1 for i in range(FAKE_OKEY_INDEX)) + (None,)
+# Okey tile for each indicator: the next number of the same color, 13 wrapping
+# to 1. The fake Okey is never an indicator and maps to itself.
+OKEY_FOR_INDICATOR: Tuple[int, ...] = tuple(
+    i - i % 13 + (i % 13 + 1) % 13 for i in range(FAKE_OKEY_INDEX)
+) + (FAKE_OKEY_INDEX,)
+
+if np is not None:
+    _TILE_COLOR_ID_ARRAY = np.array(TILE_COLOR_IDS, dtype=np.uint8)
+    # The fake Okey has number 0 in the array form.
+    _TILE_NUMBER_ARRAY = np.array([n or 0 for n in TILE_NUMBERS], dtype=np.uint8)
+    _OKEY_ARRAY = np.array(OKEY_FOR_INDICATOR, dtype=np.uint8)
+
+
+def _require_numpy() -> None:
+    """Raise ``ImportError`` when NumPy is not installed."""
+    if np is None:
+        raise ImportError("NumPy is required for array operations")
 
 
 def generate_tiles() -> List[int]:
@@ -51,16 +100,15 @@ def get_color(tile_index: int) -> str:
     -------
     str
         One of ``"yellow"``, ``"blue"``, ``"black"``, ``"red"`` or ``"fake"``.
+
+    Raises
+    ------
+    IndexError
+        If ``tile_index`` is outside ``0``–``52``.
     """
-    if tile_index == FAKE_OKEY_INDEX:
-        return 'fake'
-    if 0 <= tile_index <= 12:
-        return 'yellow'
-    if 13 <= tile_index <= 25:
-        return 'blue'
-    if 26 <= tile_index <= 38:
-        return 'black'
-    return 'red'
+    if not 0 <= tile_index <= FAKE_OKEY_INDEX:
+        raise IndexError(f"Tile index out of range: {tile_index}")
+    return TILE_COLORS[tile_index]
 
 
 def get_number(tile_index: int) -> Optional[int]:
@@ -76,19 +124,27 @@ def get_number(tile_index: int) -> Optional[int]:
     Optional[int]
         An integer between ``1`` and ``13`` or ``None`` if ``tile_index``
         refers to the fake Okey tile.
+
+    Raises
+    ------
+    IndexError
+        If ``tile_index`` is outside ``0``–``52``.
     """
-    if tile_index == FAKE_OKEY_INDEX:
-        return None
-    return (tile_index % 13) + 1
+    if not 0 <= tile_index <= FAKE_OKEY_INDEX:
+        raise IndexError(f"Tile index out of range: {tile_index}")
+    return TILE_NUMBERS[tile_index]
 
 
-def select_indicator_and_okey(tiles: List[int]) -> Tuple[int, int]:
+def select_indicator_and_okey(tiles: List[int], rng: Optional[random.Random] = None) -> Tuple[int, int]:
     """Pick the indicator tile and derive its corresponding Okey tile.
 
     Parameters
     ----------
     tiles : List[int]
         Collection of tile indices to select from.
+    rng : random.Random, optional
+        Source of randomness. The module-level ``random`` functions are used
+        when omitted.
 
     Returns
     -------
@@ -96,32 +152,60 @@ def select_indicator_and_okey(tiles: List[int]) -> Tuple[int, int]:
         ``(indicator_index, okey_index)`` where ``okey_index`` is the tile that
         acts as a joker for the chosen indicator.
     """
-    valid_tiles = [t for t in tiles if t != FAKE_OKEY_INDEX]
-    indicator = random.choice(valid_tiles)
-    base_color = get_color(indicator)
-    base_number = get_number(indicator)  # type: ignore
+    if all(t == FAKE_OKEY_INDEX for t in tiles):
+        raise IndexError("No regular tile to pick as indicator")
+    choice = random.choice if rng is None else rng.choice
+    indicator = choice(tiles)
+    while indicator == FAKE_OKEY_INDEX:
+        indicator = choice(tiles)
+    return indicator, OKEY_FOR_INDICATOR[indicator]
+
+
+def tile_color_ids(tiles: 'ArrayLike') -> 'np.ndarray':
+    """Return the color id (``0``–``3``, ``4`` for fake) of every tile in an array.
+
+    Vectorized form of ``get_color`` using ``COLOR_NAMES`` ids. Requires NumPy.
+    """
+    _require_numpy()
+    return _TILE_COLOR_ID_ARRAY[np.asarray(tiles)]
 
-    next_number = 1 if base_number == 13 else base_number + 1  # type: ignore
-    color_offset = {'yellow': 0, 'blue': 13, 'black': 26, 'red': 39}[base_color]
-    okey = color_offset + (next_number - 1)
 
-    return indicator, okey
+def tile_numbers(tiles: 'ArrayLike') -> 'np.ndarray':
+    """Return the face value of every tile in an array, ``0`` for the fake Okey.
 
+    Vectorized form of ``get_number``. Requires NumPy.
+    """
+    _require_numpy()
+    return _TILE_NUMBER_ARRAY[np.asarray(tiles)]
 
-def distribute_tiles(tiles: List[int]) -> List[List[int]]:
+
+def okeys_for(indicators: 'ArrayLike') -> 'np.ndarray':
+    """Return the Okey tile for every indicator in an array.
+
+    Vectorized form of the okey derivation in ``select_indicator_and_okey``.
+    Requires NumPy.
+    """
+    _require_numpy()
+    return _OKEY_ARRAY[np.asarray(indicators)]
+
+
+def distribute_tiles(tiles: List[int], rng: Optional[random.Random] = None) -> List[List[int]]:
     """Shuffle ``tiles`` and deal them according to ``TILES_PER_PLAYER``.
 
     Parameters
     ----------
     tiles : List[int]
         The complete deck of tiles.
+    rng : random.Random, optional
+        Source of randomness. The module-level ``random`` functions are used
+        when omitted.
 
     Returns
     -------
     List[List[int]]
         A list containing each player's hand.
     """
-    random.shuffle(tiles)
+    (random if rng is None else rng).shuffle(tiles)
     hands: List[List[int]] = []
     start = 0
     for count in TILES_PER_PLAYER:
@@ -130,66 +214,389 @@ def distribute_tiles(tiles: List[int]) -> List[List[int]]:
     return hands
 
 
-Tile = Tuple[int, str, int, bool]
+class RngStreams:
+    """Factory of reproducible, independent random streams from one master seed.
+
+    Every stream is identified by a key of non-negative integers, e.g.
+    ``(game_index,)`` or ``(worker, game_index)``. The stream seed is derived
+    by hashing the master seed with the key, so streams do not depend on the
+    order in which they are requested and any single game can be replayed
+    from its key alone.
+
+    Parameters
+    ----------
+    seed : int
+        Non-negative master seed.
+    """
+
+    def __init__(self, seed: int) -> None:
+        if seed < 0:
+            raise ValueError("seed must be non-negative")
+        self.seed = seed
+
+    def stream(self, *key: int) -> random.Random:
+        """Return the ``random.Random`` stream for ``key``."""
+        material = "/".join(str(part) for part in (self.seed,) + key).encode()
+        return random.Random(int.from_bytes(hashlib.sha256(material).digest(), 'big'))
 
+    def numpy_stream(self, *key: int) -> 'np.random.Generator':
+        """Return a NumPy ``Generator`` for ``key``, spawned from ``SeedSequence``.
 
-def _generate_all_groups(tiles: List[Tile], jokers: List[Tile]) -> List[List[Tile]]:
-    """Return all possible groups of ``tiles`` using jokers as wildcards.
+        Requires NumPy.
+        """
+        _require_numpy()
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=key))
 
-    The function produces set and run candidates of length three or four. No
-    candidate contains more than one joker from ``jokers``.
+
+def deal_batch(
+    n: int, rng: Optional['np.random.Generator'] = None
+) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+    """Deal ``n`` independent games at once.
+
+    Each game draws an indicator uniformly among the regular tiles, removes
+    it from the deck, shuffles the remaining tiles and deals them according
+    to ``TILES_PER_PLAYER``, matching ``main``. Requires NumPy.
+
+    Parameters
+    ----------
+    n : int
+        Number of games to deal. Memory grows with ``n`` (about 200 bytes per
+        game), so very large runs should be dealt in chunks.
+    rng : numpy.random.Generator, optional
+        Source of randomness. A fresh default generator is used when omitted.
+
+    Returns
+    -------
+    Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        ``(hands, indicators, okeys)``: a ``(n, 4, 15)`` ``uint8`` array with
+        14-tile hands padded by ``PAD_TILE`` and two ``(n,)`` arrays.
     """
-    groups: List[List[Tile]] = []
+    _require_numpy()
+    if rng is None:
+        rng = np.random.default_rng()
+    deck = np.array(generate_tiles(), dtype=np.uint8)
+    regular_positions = np.flatnonzero(deck != FAKE_OKEY_INDEX)
+    picks = regular_positions[rng.integers(regular_positions.size, size=n)]
+    indicators = deck[picks]
 
-    num_to_tiles: Dict[int, List[Tile]] = defaultdict(list)
-    color_num_to_tiles: Dict[str, Dict[int, List[Tile]]] = defaultdict(lambda: defaultdict(list))
-    for t in tiles:
-        num_to_tiles[t[0]].append(t)
-        color_num_to_tiles[t[1]][t[0]].append(t)
-
-    # Full SET groups (same number, different colors)
-    for num, same_num_tiles in num_to_tiles.items():
-        color_groups: Dict[str, List[Tile]] = defaultdict(list)
-        for t in same_num_tiles:
-            color_groups[t[1]].append(t)
-        colors = list(color_groups.keys())
-        for target_size in (3, 4):
-            if len(colors) + min(len(jokers), 1) < target_size:
+    keep = np.ones((n, deck.size), dtype=bool)
+    keep[np.arange(n), picks] = False
+    remaining = rng.permuted(np.tile(deck, (n, 1))[keep].reshape(n, deck.size - 1), axis=1)
+
+    width = max(TILES_PER_PLAYER)
+    hands = np.full((n, len(TILES_PER_PLAYER), width), PAD_TILE, dtype=np.uint8)
+    start = 0
+    for seat, count in enumerate(TILES_PER_PLAYER):
+        hands[:, seat, :count] = remaining[:, start:start + count]
+        start += count
+    return hands, indicators, _OKEY_ARRAY[indicators]
+
+
+# Tiles handled by the grouping search are packed into one int: bit 0 is the
+# joker flag, bits 1-6 the tile's position in the hand and the remaining
+# bits its face index (the okey face for jokers).
+Tile = int
+_TILE_UID_BITS: int = 6
+
+
+def _pack_tile(face: int, unique_id: int, is_joker: bool) -> Tile:
+    """Pack ``face``, ``unique_id`` and the joker flag into one ``Tile``."""
+    return (face << (_TILE_UID_BITS + 1)) | (unique_id << 1) | is_joker
+
+
+def _tile_face(tile: Tile) -> int:
+    """Return the face index stored in a packed ``Tile``."""
+    return tile >> (_TILE_UID_BITS + 1)
+
+
+def _tile_bit(tile: Tile) -> int:
+    """Return the mask bit of a packed ``Tile``'s position in the hand."""
+    return 1 << ((tile >> 1) & ((1 << _TILE_UID_BITS) - 1))
+
+
+def _format_face(face: int) -> str:
+    """Return ``face`` as ``color-number`` for log output."""
+    return f"{get_color(face)}-{get_number(face)}"
+
+
+# A meld requirement: the distinct regular faces it needs plus whether one
+# more slot is filled by a joker.
+MeldPattern = Tuple[Tuple[int, ...], bool]
+
+
+def _compile_meld_patterns() -> Tuple[Tuple[MeldPattern, ...], ...]:
+    """Return every set and run pattern over the 52 faces, indexed by lowest face.
+
+    Sets take three or four colors of one number and runs three or four
+    consecutive numbers of one color. Each meld also yields the variants in
+    which a joker fills one of its slots; patterns that require the same
+    faces for the same meld size are stored once.
+    """
+    templates: List[Tuple[int, ...]] = []
+    for number in range(13):
+        faces = [color * 13 + number for color in range(4)]
+        for size in (3, 4):
+            templates.extend(combinations(faces, size))
+    for color in range(4):
+        for size in (3, 4):
+            for start in range(14 - size):
+                first = color * 13 + start
+                templates.append(tuple(range(first, first + size)))
+
+    patterns = set()
+    for meld in templates:
+        patterns.add((meld, False))
+        for slot in meld:
+            patterns.add((tuple(f for f in meld if f != slot), True))
+
+    by_lowest_face: List[List[MeldPattern]] = [[] for _ in range(FAKE_OKEY_INDEX)]
+    for pattern in sorted(patterns):
+        by_lowest_face[pattern[0][0]].append(pattern)
+    return tuple(tuple(p) for p in by_lowest_face)
+
+
+# Meld patterns whose lowest regular face is the list index.
+_MELD_PATTERNS: Tuple[Tuple[MeldPattern, ...], ...] = _compile_meld_patterns()
+
+
+def _generate_all_groups(tiles: List[Tile], jokers: List[Tile]) -> List[MeldPattern]:
+    """Return the meld patterns that can be formed from ``tiles`` and ``jokers``.
+
+    Candidates are produced at the face level: each set or run pattern from
+    ``_MELD_PATTERNS`` whose faces are all present (and, for joker patterns,
+    with at least one joker in hand) appears exactly once, however many
+    copies of its faces the hand holds. Which copies a group takes is left to
+    ``_find_best_grouping``.
+    """
+    present = {_tile_face(t) for t in tiles}
+
+    groups: List[MeldPattern] = []
+    for face in sorted(present):
+        for pattern in _MELD_PATTERNS[face]:
+            real_faces, uses_joker = pattern
+            if uses_joker and not jokers:
                 continue
-            for color_subset in combinations(colors, min(len(colors), target_size)):
-                if len(color_subset) + min(len(jokers), 1) < target_size:
-                    continue
-                tile_lists = [color_groups[c] for c in color_subset]
-                for combo in product(*tile_lists):
-                    missing = target_size - len(combo)
-                    if 0 <= missing <= 1 and missing <= len(jokers):
-                        groups.append(list(combo) + jokers[:missing])
-
-    # Full RUN groups (same color, consecutive numbers)
-    for color, num_map in color_num_to_tiles.items():
-        nums = sorted(num_map.keys())
-        for target_size in (3, 4):
-            for start in range(1, 14 - target_size + 1):
-                window = list(range(start, start + target_size))
-                present_tiles = [num_map[n][0] for n in window if n in num_map]
-                missing = target_size - len(present_tiles)
-                if 0 <= missing <= 1 and missing <= len(jokers) and len(present_tiles) >= target_size - 1:
-                    groups.append(present_tiles + jokers[:missing])
-
-
-    unique: List[List[Tile]] = []
-    seen = set()
-    for g in groups:
-        key = tuple(sorted(g))
-        if key not in seen:
-            seen.add(key)
-            unique.append(g)
-    return unique
-
-
-def _is_double_run(hand: List[int], okey: int, indicator: int) -> bool:
-    """Check whether ``hand`` forms a double run of seven pairs."""
-    counts: Dict[int, int] = defaultdict(int)
+            if all(f in present for f in real_faces):
+                groups.append(pattern)
+    return groups
+
+
+def _is_double_run_counts(counts: Sequence[int], jokers: int) -> bool:
+    """Check whether a face-count vector plus jokers forms seven pairs."""
+    pairs = 0
+    singles = 0
+    for c in counts:
+        pairs += c // 2
+        singles += c % 2
+
+    if singles > jokers:
+        return False
+    pairs += singles + (jokers - singles) // 2
+
+    return pairs == 7 and pairs * 2 == sum(counts) + jokers
+
+
+def _popcount(mask: int) -> int:
+    """Return the number of set bits in ``mask``."""
+    return bin(mask).count('1')
+
+
+def _find_best_grouping(hand: List[Tile]) -> Tuple[List[List[Tile]], List[Tile]]:
+    """Search all valid groupings and return the one with the fewest leftovers.
+
+    The function performs a branch-and-bound search across the face-level
+    meld patterns generated by ``_generate_all_groups``. Tiles are tracked as
+    bits of an integer mask keyed by their position and each pattern is a
+    list of slots, one mask per face holding the bits of that face's copies
+    (jokers form one more such mask). Copies of a face are interchangeable,
+    so a pattern always takes the lowest unused copy of each slot and may be
+    chosen again while copies remain.
+
+    Candidates are kept in a fixed order (larger groups first, then by
+    pattern) and each branch only continues with candidates at or after the
+    one it chose, so every multiset of groups is explored once rather than
+    in every order. A branch is cut when even grouping every tile its
+    remaining candidates touch cannot beat the best grouping found, and the
+    search stops as soon as no tile is left over.
+    """
+    jokers = [t for t in hand if t & 1]
+    tiles = [t for t in hand if not t & 1]
+
+    face_bits: Dict[int, int] = defaultdict(int)
+    for t in tiles:
+        face_bits[_tile_face(t)] |= _tile_bit(t)
+    joker_bits = 0
+    for t in jokers:
+        joker_bits |= _tile_bit(t)
+
+    patterns = _generate_all_groups(tiles, jokers)
+    patterns.sort(key=lambda p: (-len(p[0]) - p[1], p))
+
+    group_slots: List[Tuple[int, ...]] = []
+    group_masks: List[int] = []
+    for real_faces, uses_joker in patterns:
+        slots = tuple(face_bits[f] for f in real_faces) + ((joker_bits,) if uses_joker else ())
+        mask = 0
+        for slot in slots:
+            mask |= slot
+        group_slots.append(slots)
+        group_masks.append(mask)
+
+    best_chosen: List[int] = []
+    best_covered = 0
+    perfect = len(hand)
+
+    def backtrack(chosen: List[int], used: int, covered: int, candidates: List[int]) -> bool:
+        """Extend ``chosen``; return ``True`` once every tile is grouped."""
+        nonlocal best_chosen, best_covered
+        if covered > best_covered:
+            best_covered = covered
+            best_chosen = chosen[:]
+            if covered == perfect:
+                return True
+        free = [i for i in candidates if all(slot & ~used for slot in group_slots[i])]
+        reachable = 0
+        for i in free:
+            reachable |= group_masks[i]
+        if covered + _popcount(reachable & ~used) <= best_covered:
+            return False
+        for position, i in enumerate(free):
+            taken = 0
+            for slot in group_slots[i]:
+                available = slot & ~used
+                taken |= available & -available
+            chosen.append(taken)
+            done = backtrack(chosen, used | taken, covered + len(group_slots[i]), free[position:])
+            chosen.pop()
+            if done:
+                return True
+        return False
+
+    backtrack([], 0, 0, list(range(len(patterns))))
+
+    best_groups = [[t for t in hand if taken & _tile_bit(t)] for taken in best_chosen]
+    best_used = 0
+    for taken in best_chosen:
+        best_used |= taken
+    best_remaining = [t for t in hand if not best_used & _tile_bit(t)]
+    return best_groups, best_remaining
+
+
+def _take_lowest(slots: Tuple[int, ...], used: int) -> int:
+    """Return the mask of the lowest unused copy in every slot, or ``0`` if one is exhausted."""
+    taken = 0
+    for slot in slots:
+        available = slot & ~used
+        if not available:
+            return 0
+        taken |= available & -available
+    return taken
+
+
+def _find_anchored_grouping(
+    hand: List[Tile], max_nodes: Optional[int] = None, deadline: Optional[float] = None
+) -> Tuple[List[List[Tile]], List[Tile], bool]:
+    """Return the grouping with the fewest leftovers by anchored exact cover.
+
+    Instead of choosing among all candidate groups, every node branches on
+    the lowest face that still has an undecided copy: the lowest copy either
+    joins one of the patterns whose lowest face it is (the only ones that
+    can still fit, as all lower faces are decided) or all undecided copies of
+    the face are left ungrouped. Leaving some copies while grouping others is
+    the same as grouping the lower copies first, so that choice is not
+    repeated. The branching factor is bounded by the patterns anchored at one
+    face and the depth by the number of regular tiles; jokers not taken by a
+    group are left over once every face is decided. A branch is cut as soon
+    as it leaves at least as many tiles as the best grouping found.
+
+    The search starts from the greedy grouping that takes the first fitting
+    pattern at every face. It stops early after visiting ``max_nodes`` nodes
+    or once ``time.perf_counter()`` passes ``deadline``; the last element of
+    the result tells whether the grouping is proven optimal.
+    """
+    jokers = [t for t in hand if t & 1]
+    tiles = [t for t in hand if not t & 1]
+
+    face_bits: Dict[int, int] = defaultdict(int)
+    for t in tiles:
+        face_bits[_tile_face(t)] |= _tile_bit(t)
+    joker_bits = 0
+    for t in jokers:
+        joker_bits |= _tile_bit(t)
+    faces = sorted(face_bits)
+
+    # Candidate groups indexed by their lowest face, larger groups first.
+    anchored: Dict[int, List[Tuple[int, ...]]] = defaultdict(list)
+    for real_faces, uses_joker in sorted(
+        _generate_all_groups(tiles, jokers), key=lambda p: (-len(p[0]) - p[1], p)
+    ):
+        slots = tuple(face_bits[f] for f in real_faces) + ((joker_bits,) if uses_joker else ())
+        anchored[real_faces[0]].append(slots)
+
+    best_chosen: List[int] = []
+    grouped = 0
+    for face in faces:
+        taken = 1
+        while taken:
+            taken = next(filter(None, (_take_lowest(slots, grouped) for slots in anchored[face])), 0)
+            if taken:
+                best_chosen.append(taken)
+                grouped |= taken
+    best_left = len(hand) - _popcount(grouped)
+    nodes = 0
+    exhausted = False
+
+    def search(chosen: List[int], used: int, left: int, position: int) -> bool:
+        """Decide the faces from ``position`` on; return ``True`` to stop the search."""
+        nonlocal best_chosen, best_left, nodes, exhausted
+        if left >= best_left:
+            return False
+        nodes += 1
+        if (max_nodes is not None and nodes > max_nodes) or (
+            deadline is not None and not nodes & 63 and time.perf_counter() >= deadline
+        ):
+            exhausted = True
+            return True
+        while position < len(faces) and not face_bits[faces[position]] & ~used:
+            position += 1
+        if position == len(faces):
+            left += _popcount(joker_bits & ~used)
+            if left < best_left:
+                best_left = left
+                best_chosen = chosen[:]
+            return left == 0
+
+        face = faces[position]
+        for slots in anchored[face]:
+            taken = _take_lowest(slots, used)
+            if taken:
+                chosen.append(taken)
+                done = search(chosen, used | taken, left, position)
+                chosen.pop()
+                if done:
+                    return True
+        undecided = face_bits[face] & ~used
+        return search(chosen, used | undecided, left + _popcount(undecided), position + 1)
+
+    if best_left:
+        search([], 0, 0, 0)
+
+    best_used = 0
+    for taken in best_chosen:
+        best_used |= taken
+    best_groups = [[t for t in hand if taken & _tile_bit(t)] for taken in best_chosen]
+    best_remaining = [t for t in hand if not best_used & _tile_bit(t)]
+    return best_groups, best_remaining, not exhausted or not best_remaining
+
+
+def _hand_counts(hand: List[int], okey: int, indicator: int) -> Tuple[Tuple[int, ...], int]:
+    """Return the face-count vector of ``hand`` and its number of jokers.
+
+    The vector has one entry per regular face ``0``–``51``. Fake Okey tiles are
+    folded into ``FAKE_OKEY_FACE_INDEX`` or counted as jokers following the
+    same rules as ``score_hand``.
+    """
+    counts = [0] * FAKE_OKEY_INDEX
     jokers = 0
     for t in hand:
         if t == FAKE_OKEY_INDEX:
@@ -201,114 +608,1637 @@ def _is_double_run(hand: List[int], okey: int, indicator: int) -> bool:
             jokers += 1
         else:
             counts[t] += 1
+    return tuple(counts), jokers
 
-    pairs = 0
-    singles = []
-    for c in counts.values():
-        pairs += c // 2
-        if c % 2:
-            singles.append(1)
 
-    if len(singles) > jokers:
-        return False
-    pairs += len(singles)
-    jokers -= len(singles)
-    pairs += jokers // 2
+def _dp_moves(
+    counts: Tuple[int, ...], jokers: int
+) -> Iterator[Tuple[Tuple[int, ...], int, Optional[Tuple[Optional[int], ...]]]]:
+    """Yield the successor states of the lowest face still present in ``counts``.
 
-    return pairs == 7 and pairs * 2 == len(hand)
+    Each item is ``(counts, jokers, group)``. ``group`` is ``None`` when the
+    tile is left ungrouped; otherwise it lists the faces of the meld with
+    ``None`` in place of a joker.
+    """
+    face = next(i for i, c in enumerate(counts) if c)
+    rest = list(counts)
+    rest[face] -= 1
+    yield tuple(rest), jokers, None
+    for real_faces, uses_joker in _MELD_PATTERNS[face]:
+        if uses_joker and not jokers:
+            continue
+        after = rest[:]
+        for f in real_faces[1:]:
+            if not after[f]:
+                break
+            after[f] -= 1
+        else:
+            if uses_joker:
+                yield tuple(after), jokers - 1, real_faces + (None,)
+            else:
+                yield tuple(after), jokers, real_faces
 
 
-def _find_best_grouping(hand: List[Tile]) -> Tuple[List[List[Tile]], List[Tile]]:
-    """Search all valid groupings and return the one with the fewest leftovers.
+def _dp_leftover(
+    counts: Tuple[int, ...], jokers: int, memo: Optional[Dict[Tuple[Tuple[int, ...], int], int]] = None
+) -> int:
+    """Return the fewest ungrouped tiles for a face-count vector.
+
+    The recursion always branches on the lowest remaining face: it is either
+    left ungrouped or placed in one of the melds that contain it. Results are
+    memoized on ``(counts, jokers)`` in ``memo`` so identical sub-hands are
+    solved once; a fresh memo is used for each top-level call so memory does
+    not grow across hands.
+    """
+    if memo is None:
+        memo = {}
+    key = (counts, jokers)
+    value = memo.get(key)
+    if value is None:
+        if not any(counts):
+            value = jokers
+        else:
+            value = min(
+                _dp_leftover(after, left, memo) + (group is None)
+                for after, left, group in _dp_moves(counts, jokers)
+            )
+        memo[key] = value
+    return value
+
+
+def _dp_grouping(
+    counts: Tuple[int, ...], jokers: int
+) -> Tuple[List[Tuple[Optional[int], ...]], List[Optional[int]]]:
+    """Rebuild an optimal grouping from ``_dp_leftover`` values.
 
-    The function performs a backtracking search across all possible set and run
-    combinations generated by ``_generate_all_groups``.
+    Returns ``(groups, remaining)`` using face indices, with ``None`` standing
+    for a joker.
     """
-    jokers = [t for t in hand if t[3]]
-    tiles = [t for t in hand if not t[3]]
+    memo: Dict[Tuple[Tuple[int, ...], int], int] = {}
+    groups: List[Tuple[Optional[int], ...]] = []
+    remaining: List[Optional[int]] = []
+    while any(counts):
+        target = _dp_leftover(counts, jokers, memo)
+        for after, left, group in _dp_moves(counts, jokers):
+            if _dp_leftover(after, left, memo) + (group is None) == target:
+                if group is None:
+                    remaining.append(next(i for i, c in enumerate(counts) if c))
+                else:
+                    groups.append(group)
+                counts, jokers = after, left
+                break
+    remaining.extend([None] * jokers)
+    return groups, remaining
+
+
+# Patterns of a single color (local faces 0-12) and of a single number
+# (local colors 0-3) used by the per-color decomposition engine.
+_RUN_PATTERNS: Tuple[Tuple[MeldPattern, ...], ...] = tuple(
+    tuple(p for p in _MELD_PATTERNS[face] if p[0][-1] < 13) for face in range(13)
+)
+_SET_PATTERNS: Tuple[MeldPattern, ...] = tuple(
+    (tuple(f // 13 for f in faces), uses_joker)
+    for lowest in range(0, FAKE_OKEY_INDEX, 13)
+    for faces, uses_joker in _MELD_PATTERNS[lowest]
+    if all(f % 13 == 0 for f in faces)
+)
+_POW3: Tuple[int, ...] = tuple(3 ** i for i in range(14))
+# Jokers tracked per color by the run table.
+RUN_TABLE_MAX_JOKERS: int = 2
+
 
-    all_groups = _generate_all_groups(tiles, jokers)
+def _run_entry(code: int, jokers: int, lookup: Callable[[int, int], int]) -> int:
+    """Solve one run-table entry from already solved smaller entries.
 
-    best_groups: List[List[Tile]] = []
-    best_remaining: List[Tile] = hand[:]
+    ``code`` is the base-3 encoding of one color's 13 face counts. The value is
+    the fewest leftover tiles, counting unused jokers, when that color is
+    grouped with runs only. ``lookup(code, jokers)`` returns smaller entries.
+    """
+    if not code:
+        return jokers
+    face = 0
+    while not (code // _POW3[face]) % 3:
+        face += 1
+    rest = code - _POW3[face]
+    best = 1 + lookup(rest, jokers)
+    for real_faces, uses_joker in _RUN_PATTERNS[face]:
+        if uses_joker and not jokers:
+            continue
+        after = rest
+        for f in real_faces[1:]:
+            if not (after // _POW3[f]) % 3:
+                break
+            after -= _POW3[f]
+        else:
+            best = min(best, lookup(after, jokers - uses_joker))
+    return best
+
+
+class RunTable:
+    """Lookup table of single-color run solutions.
+
+    Entry ``code * 3 + jokers`` holds the fewest leftover tiles of a color
+    whose 13 face counts are base-3 encoded in ``code`` when up to ``jokers``
+    jokers are assigned to it. Without backing ``data`` entries are solved on
+    demand into a one-byte-per-entry buffer, so memory never exceeds ``SIZE``
+    bytes; a fully built table can be memory-mapped with
+    ``RunTable.from_file``.
+    """
+
+    SIZE: int = 3 ** 13 * (RUN_TABLE_MAX_JOKERS + 1)
+    # Marks entries of the on-demand buffer that are not solved yet.
+    UNSOLVED: int = 0xFF
+
+    def __init__(self, data: Optional[Union[bytes, bytearray, mmap.mmap]] = None) -> None:
+        if data is not None and len(data) != self.SIZE:
+            raise ValueError(f"Run table must have {self.SIZE} entries, got {len(data)}")
+        self._data = data
+        self._solved: Optional[bytearray] = None
+
+    @classmethod
+    def from_file(cls, path: str) -> 'RunTable':
+        """Memory-map a table written by ``build_run_table``."""
+        with open(path, 'rb') as fh:
+            data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(data)
+
+    def lookup(self, code: int, jokers: int) -> int:
+        """Return the entry for ``code`` with ``jokers`` jokers."""
+        index = code * 3 + jokers
+        if self._data is not None:
+            return self._data[index]
+        if self._solved is None:
+            self._solved = bytearray([self.UNSOLVED]) * self.SIZE
+        value = self._solved[index]
+        if value == self.UNSOLVED:
+            value = _run_entry(code, jokers, self.lookup)
+            self._solved[index] = value
+        return value
+
+
+def build_run_table(path: str) -> None:
+    """Solve every run-table entry and write the table to ``path``.
+
+    Entries are filled in increasing code order so each one only reads
+    smaller, already solved codes. The result is one byte per entry and can be
+    loaded with ``RunTable.from_file``. Solving all 3^13 x 3 entries takes
+    around twenty seconds, so build the file once and reuse it.
+    """
+    data = bytearray(RunTable.SIZE)
+
+    def lookup(code: int, jokers: int) -> int:
+        return data[code * 3 + jokers]
+
+    for code in range(3 ** 13):
+        for jokers in range(RUN_TABLE_MAX_JOKERS + 1):
+            data[code * 3 + jokers] = _run_entry(code, jokers, lookup)
+    with open(path, 'wb') as fh:
+        fh.write(data)
+
+
+_run_table = RunTable()
+
+
+def set_run_table(table: RunTable) -> None:
+    """Use ``table`` for the ``"decompose"`` scoring engine."""
+    global _run_table
+    _run_table = table
+
+
+@lru_cache(maxsize=None)
+def _set_options(column: Tuple[int, ...], jokers: int) -> Tuple[Tuple[Tuple[int, ...], int], ...]:
+    """Return the ways to form sets from one number's per-color counts.
+
+    Each option is ``(used, jokers_used)`` where ``used`` holds the tiles taken
+    from each color. Up to three sets fit on one number with two jokers.
+    """
+    options: Set[Tuple[Tuple[int, ...], int]] = {((0, 0, 0, 0), 0)}
 
-    def backtrack(chosen: List[List[Tile]], used: List[Tile]) -> None:
-        nonlocal best_groups, best_remaining
-        remaining = [t for t in hand if t not in used]
-        if len(remaining) < len(best_remaining):
-            best_remaining = remaining[:]
-            best_groups = chosen[:]
-        for g in all_groups:
-            if any(tile in used for tile in g):
+    def extend(used: List[int], jokers_used: int, start: int) -> None:
+        for i in range(start, len(_SET_PATTERNS)):
+            colors, uses_joker = _SET_PATTERNS[i]
+            if jokers_used + uses_joker > jokers:
                 continue
-            backtrack(chosen + [g], used + g)
+            if any(used[c] >= column[c] for c in colors):
+                continue
+            for c in colors:
+                used[c] += 1
+            options.add((tuple(used), jokers_used + uses_joker))
+            extend(used, jokers_used + uses_joker, i)
+            for c in colors:
+                used[c] -= 1
 
-    backtrack([], [])
-    return best_groups, best_remaining
+    extend([0, 0, 0, 0], 0, 0)
+    return tuple(sorted(options))
+
+
+def _run_options(code: int, jokers: int) -> Tuple[int, ...]:
+    """Return the run-table entries of one color's ``code`` for 0 to ``jokers`` jokers.
+
+    ``jokers`` is capped at ``RUN_TABLE_MAX_JOKERS``.
+    """
+    lookup = _run_table.lookup
+    if not jokers:
+        return (lookup(code, 0),)
+    if jokers == 1:
+        return lookup(code, 0), lookup(code, 1)
+    return lookup(code, 0), lookup(code, 1), lookup(code, 2)
+
+
+def _resolve_runs(runs: Sequence[Tuple[int, ...]], jokers: int) -> int:
+    """Return the fewest leftover tiles of four colors solved with runs only.
+
+    ``runs`` holds the ``_run_options`` of each color, covering at least
+    ``jokers`` jokers; the jokers are spread over the colors in the cheapest
+    way.
+    """
+    total = runs[0][0] + runs[1][0] + runs[2][0] + runs[3][0]
+    if not jokers:
+        return total
+    result = total + jokers
+    for i in range(4):
+        gain_one = runs[i][1] - runs[i][0]
+        result = min(result, total + gain_one + jokers - 1)
+        if jokers > 1:
+            result = min(result, total + runs[i][2] - runs[i][0])
+            for j in range(i + 1, 4):
+                result = min(result, total + gain_one + runs[j][1] - runs[j][0])
+    return result
+
+
+def _decompose_search(
+    codes: Sequence[int],
+    runs: Sequence[Tuple[int, ...]],
+    set_numbers: Sequence[Tuple[int, Tuple[int, ...]]],
+    jokers: int,
+    best: int,
+    floor: int = 0,
+) -> int:
+    """Return the fewest leftover tiles over every choice of sets.
+
+    ``codes`` are the per-color run codes of the whole hand and ``runs`` their
+    ``_run_options`` for ``jokers`` jokers. ``set_numbers`` lists the numbers
+    that can hold a set with their per-color counts. Colors a set choice does
+    not touch reuse ``runs``; the others are looked up again. ``best`` is an
+    upper bound such as the number of tiles and the search stops once it
+    reaches the lower bound ``floor``.
+    """
+    if not set_numbers:
+        return min(best, _resolve_runs(runs, jokers))
+    codes = list(codes)
+    current = list(codes)
+
+    def choose_sets(position: int, jokers_left: int) -> None:
+        nonlocal best
+        if best <= floor:
+            return
+        if position == len(set_numbers):
+            if current == codes:
+                leaf_runs = runs
+            else:
+                leaf_runs = [
+                    runs[c] if current[c] == codes[c] else _run_options(current[c], jokers_left) for c in range(4)
+                ]
+            best = min(best, _resolve_runs(leaf_runs, jokers_left))
+            return
+        number, column = set_numbers[position]
+        for used, jokers_used in _set_options(column, jokers_left):
+            for color in range(4):
+                current[color] -= used[color] * _POW3[number]
+            choose_sets(position + 1, jokers_left - jokers_used)
+            for color in range(4):
+                current[color] += used[color] * _POW3[number]
+
+    choose_sets(0, jokers)
+    return best
+
+
+def _decompose_leftover(counts: Tuple[int, ...], jokers: int) -> int:
+    """Return the fewest ungrouped tiles by fixing sets, then solving runs per color.
+
+    Set choices are enumerated number by number; the runs of each color are
+    then read from the run table and the remaining jokers are spread over the
+    colors in the cheapest way. Fake Okeys can push a face count above two or
+    the joker count above ``RUN_TABLE_MAX_JOKERS``, which the table cannot
+    encode; such hands are handed to ``_dp_leftover``.
+    """
+    if jokers > RUN_TABLE_MAX_JOKERS or max(counts) > 2:
+        return _dp_leftover(counts, jokers)
+    codes = [0, 0, 0, 0]
+    for face, c in enumerate(counts):
+        if c:
+            codes[face // 13] += c * _POW3[face % 13]
+    # Only numbers with at least two colors present can ever hold a set.
+    set_numbers: List[Tuple[int, Tuple[int, ...]]] = []
+    for n in range(13):
+        column = (counts[n], counts[13 + n], counts[26 + n], counts[39 + n])
+        if sum(1 for c in column if c) + min(jokers, 1) >= 3:
+            set_numbers.append((n, column))
+    runs = [_run_options(code, jokers) for code in codes]
+    return _decompose_search(codes, runs, set_numbers, jokers, sum(counts) + jokers)
+
+
+HandKey = Tuple[Tuple[Tuple[int, ...], ...], int]
+
+
+def _canonical_key(hand: List[int], okey: int, indicator: int) -> HandKey:
+    """Return a key shared by all hands that score the same.
+
+    Tile order, duplicate positions and the okey/indicator are absorbed by the
+    face-count vector and joker count. Since the rules treat all colors alike,
+    the four per-color count rows are sorted so color permutations collide.
+    """
+    counts, jokers = _hand_counts(hand, okey, indicator)
+    rows = sorted(counts[offset:offset + 13] for offset in range(0, FAKE_OKEY_INDEX, 13))
+    return tuple(rows), jokers
+
+
+class CacheInfo(NamedTuple):
+    """Usage counters of a ``ScoreCache``."""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class ScoreCache:
+    """Bounded LRU cache of leftover counts keyed on canonical hands.
+
+    Pass an instance to ``score_hand`` through its ``cache`` argument. Hands
+    that only differ in tile order, duplicate ids or a relabeling of the four
+    colors share one entry.
+    """
+
+    def __init__(self, maxsize: int = 65536) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[HandKey, int]' = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: HandKey) -> Optional[int]:
+        """Return the cached score for ``key`` or ``None`` on a miss."""
+        value = self._entries.get(key)
+        if value is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: HandKey, value: int) -> None:
+        """Store ``value`` for ``key``, evicting the least recently used entry."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def info(self) -> CacheInfo:
+        """Return the hit, miss and eviction counters and the current size."""
+        return CacheInfo(self._hits, self._misses, self._evictions, self.maxsize, len(self._entries))
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        self._entries.clear()
+        self._hits = self._misses = self._evictions = 0
+
+
+class HandEvaluator:
+    """Hand that can be changed one tile at a time and rescored cheaply.
+
+    The evaluator keeps the state of the ``"decompose"`` engine up to date on
+    ``add`` and ``remove``: the per-color run codes and their run-table
+    entries, the per-number color counts that decide which sets are possible,
+    and the pair counts of the seven-pairs check. A change only touches the
+    color and number of the tile, so ``score`` skips the hand conversion and
+    goes straight to combining set choices with the cached run entries.
+    The last score also bounds the next one from below, so that search stops
+    as soon as a grouping reaches the bound. Scores of previously seen states
+    are remembered, so undoing a draw or trying every discard in turn is
+    mostly lookups.
+
+    Parameters
+    ----------
+    hand : List[int]
+        Initial tile indices.
+    okey : int
+        Index of the Okey tile.
+    indicator : int
+        Index of the indicator tile.
+    """
+
+    def __init__(self, hand: List[int], okey: int, indicator: int) -> None:
+        self.okey = okey
+        self.indicator = indicator
+        self._hand = list(hand)
+        counts, self._jokers = _hand_counts(hand, okey, indicator)
+        self._counts = list(counts)
+        self._codes = [0, 0, 0, 0]
+        # Run-table entries per color for up to two jokers; empty once stale.
+        self._runs: List[Tuple[int, ...]] = [(), (), (), ()]
+        self._columns: List[Tuple[int, ...]] = [
+            (counts[n], counts[13 + n], counts[26 + n], counts[39 + n]) for n in range(13)
+        ]
+        self._present = [sum(1 for c in column if c) for column in self._columns]
+        self._pairs = self._singles = self._tiles = self._overfull = 0
+        for face, c in enumerate(counts):
+            self._codes[face // 13] += c * _POW3[face % 13]
+            self._pairs += c // 2
+            self._singles += c % 2
+            self._tiles += c
+            self._overfull += c > 2
+        # Lower bound on the current score: removing a tile lowers the score
+        # by at most one, and adding one by at most three (taking the middle
+        # tile out of a four-tile run can leave three tiles ungrouped).
+        self._floor = 0
+        self._scores: Dict[Tuple[Tuple[int, ...], int], int] = {}
+
+    @property
+    def hand(self) -> List[int]:
+        """Return a copy of the current tile indices."""
+        return list(self._hand)
 
+    def face(self, tile: int) -> Optional[int]:
+        """Return the face ``tile`` counts as in this hand, or ``None`` for a joker."""
+        if tile == FAKE_OKEY_INDEX:
+            return None if self.indicator == FAKE_OKEY_FACE_INDEX else FAKE_OKEY_FACE_INDEX
+        return None if tile == self.okey else tile
 
-def score_hand(hand: List[int], okey: int, indicator: int, *, log_details: bool = False) -> int:
+    def _change(self, tile: int, delta: int) -> None:
+        """Add ``delta`` (``1`` or ``-1``) copies of ``tile`` to the cached state."""
+        self._floor = max(0, self._floor - (3 if delta > 0 else 1))
+        face = self.face(tile)
+        if face is None:
+            self._jokers += delta
+            return
+        old = self._counts[face]
+        new = old + delta
+        self._counts[face] = new
+        color, number = divmod(face, 13)
+        self._codes[color] += delta * _POW3[number]
+        self._runs[color] = ()
+        column = list(self._columns[number])
+        column[color] = new
+        self._columns[number] = tuple(column)
+        self._present[number] += (new > 0) - (old > 0)
+        self._pairs += new // 2 - old // 2
+        self._singles += new % 2 - old % 2
+        self._tiles += delta
+        self._overfull += (new > 2) - (old > 2)
+
+    def add(self, tile: int) -> None:
+        """Add ``tile`` to the hand."""
+        self._hand.append(tile)
+        self._change(tile, 1)
+
+    def remove(self, tile: int) -> None:
+        """Remove one copy of ``tile`` from the hand.
+
+        Raises
+        ------
+        ValueError
+            If ``tile`` is not in the hand.
+        """
+        self._hand.remove(tile)
+        self._change(tile, -1)
+
+    def _is_double_run(self) -> bool:
+        """Same check as ``_is_double_run_counts`` from the cached pair counts."""
+        jokers = self._jokers
+        if self._singles > jokers:
+            return False
+        pairs = self._pairs + self._singles + (jokers - self._singles) // 2
+        return pairs == 7 and pairs * 2 == self._tiles + jokers
+
+    def score(self) -> int:
+        """Return the number of ungrouped tiles, as ``score_hand`` would."""
+        key = (tuple(self._counts), self._jokers)
+        leftover = self._scores.get(key)
+        if leftover is None:
+            jokers = self._jokers
+            if self._is_double_run():
+                leftover = 0
+            elif jokers > RUN_TABLE_MAX_JOKERS or self._overfull:
+                leftover = _dp_leftover(*key)
+            else:
+                runs = self._runs
+                for color in range(4):
+                    if not runs[color]:
+                        runs[color] = _run_options(self._codes[color], RUN_TABLE_MAX_JOKERS)
+                set_numbers = [
+                    (n, self._columns[n]) for n in range(13) if self._present[n] + min(jokers, 1) >= 3
+                ]
+                leftover = _decompose_search(
+                    self._codes, runs, set_numbers, jokers, self._tiles + jokers, self._floor
+                )
+            self._scores[key] = leftover
+        self._floor = leftover
+        return leftover
+
+
+def best_discards(hand: List[int], okey: int, indicator: int) -> List[int]:
+    """Return the leftover count after discarding each tile of ``hand``.
+
+    Entry ``i`` equals ``score_hand`` of ``hand`` without position ``i``. All
+    sub-hands share one ``HandEvaluator``, so the hand is converted once,
+    tiles that count as the same face are scored once and each discard only
+    updates the color and number it touches.
+    """
+    evaluator = HandEvaluator(hand, okey, indicator)
+    by_face: Dict[Optional[int], int] = {}
+    results: List[int] = []
+    for tile in hand:
+        face = evaluator.face(tile)
+        if face not in by_face:
+            evaluator.remove(tile)
+            by_face[face] = evaluator.score()
+            evaluator.add(tile)
+        results.append(by_face[face])
+    return results
+
+
+def _batch_counts(
+    hands: 'ArrayLike', okeys: 'ArrayLike', indicators: 'ArrayLike'
+) -> Tuple['np.ndarray', 'np.ndarray']:
+    """Return ``(faces, jokers)`` arrays for a batch of hands.
+
+    ``hands`` is either an ``(N, 53)`` matrix of tile counts or an ``(N, k)``
+    array of tile indices padded with ``PAD_TILE``. ``okeys`` and
+    ``indicators`` are scalars or ``(N,)`` arrays. ``faces`` has one column
+    per regular face after applying the same joker and Fake Okey rules as
+    ``score_hand``.
+    """
+    hands = np.asarray(hands)
+    if hands.ndim != 2:
+        raise ValueError("hands must be a two-dimensional array")
+    n = hands.shape[0]
+    if hands.shape[1] == FAKE_OKEY_INDEX + 1:
+        counts = hands.astype(np.int16)
+    else:
+        index = hands.astype(np.int64)
+        index[index == PAD_TILE] = FAKE_OKEY_INDEX + 1
+        counts = np.zeros((n, FAKE_OKEY_INDEX + 2), dtype=np.int16)
+        np.add.at(counts, (np.repeat(np.arange(n), index.shape[1]), index.ravel()), 1)
+        counts = counts[:, :FAKE_OKEY_INDEX + 1]
+
+    okeys = np.broadcast_to(np.asarray(okeys, dtype=np.int64), (n,))
+    fake_is_joker = np.broadcast_to(np.asarray(indicators) == FAKE_OKEY_FACE_INDEX, (n,))
+    rows = np.arange(n)
+    fakes = counts[:, FAKE_OKEY_INDEX]
+    faces = counts[:, :FAKE_OKEY_INDEX].copy()
+    # An okey of ``FAKE_OKEY_INDEX`` never turns a regular face into a joker.
+    regular = okeys < FAKE_OKEY_INDEX
+    okey_faces = np.where(regular, okeys, 0)
+    jokers = np.where(regular, faces[rows, okey_faces], 0) + np.where(fake_is_joker, fakes, 0)
+    faces[rows[regular], okeys[regular]] = 0
+    faces[:, FAKE_OKEY_FACE_INDEX] += np.where(fake_is_joker, 0, fakes)
+    return faces, jokers
+
+
+@lru_cache(maxsize=None)
+def _pattern_matrix() -> Tuple['np.ndarray', 'np.ndarray']:
+    """Return the meld patterns as an incidence matrix plus joker flags."""
+    patterns = [p for by_face in _MELD_PATTERNS for p in by_face]
+    matrix = np.zeros((len(patterns), FAKE_OKEY_INDEX), dtype=np.float32)
+    for i, (faces, _) in enumerate(patterns):
+        matrix[i, list(faces)] = 1
+    uses_joker = np.array([uses for _, uses in patterns], dtype=bool)
+    return matrix, uses_joker
+
+
+def _double_run_mask(faces: 'np.ndarray', jokers: 'np.ndarray') -> 'np.ndarray':
+    """Return which rows of a face-count matrix form seven pairs.
+
+    Vectorized form of ``_is_double_run_counts``: singles must be covered by
+    jokers and the pairs, joker-completed singles and joker pairs must add up
+    to exactly seven for a 14-tile hand.
+    """
+    pairs = (faces // 2).sum(axis=1)
+    singles = (faces % 2).sum(axis=1)
+    totals = faces.sum(axis=1) + jokers
+    return (singles <= jokers) & (pairs + singles + (jokers - singles) // 2 == 7) & (totals == 14)
+
+
+def double_run_batch(hands: 'ArrayLike', okeys: 'ArrayLike', indicators: 'ArrayLike') -> 'np.ndarray':
+    """Return an ``(N,)`` boolean array marking the seven-pairs hands.
+
+    Takes the same inputs as ``score_batch``. Requires NumPy.
+    """
+    _require_numpy()
+    faces, jokers = _batch_counts(hands, okeys, indicators)
+    return _double_run_mask(faces, jokers)
+
+
+def score_batch(hands: 'ArrayLike', okeys: 'ArrayLike', indicators: 'ArrayLike') -> 'np.ndarray':
+    """Score many hands at once and return an ``(N,)`` array of leftovers.
+
+    Parameters
+    ----------
+    hands : array_like
+        ``(N, 53)`` tile-count matrix or ``(N, k)`` tile-index array padded
+        with ``PAD_TILE``.
+    okeys, indicators : int or array_like
+        Okey and indicator per row, or one value for the whole batch.
+
+    Count conversion, Fake Okey substitution, seven-pairs detection and a
+    bound that drops tiles no meld can use are computed with array
+    operations. Seven-pairs rows are settled first and skip all further
+    work; only rows that still hold usable tiles are solved one by one with
+    the ``"decompose"`` engine. Requires NumPy.
+    """
+    _require_numpy()
+    faces, jokers = _batch_counts(hands, okeys, indicators)
+    result = np.zeros(len(faces), dtype=np.int64)
+    pending = np.flatnonzero(~_double_run_mask(faces, jokers))
+    if not pending.size:
+        return result
+    faces = faces[pending]
+    jokers = jokers[pending]
+
+    matrix, uses_joker = _pattern_matrix()
+    # Float matrices keep the incidence products on the BLAS path.
+    present = (faces > 0).astype(np.float32)
+    available = present @ matrix.T == matrix.sum(axis=1)
+    available &= ~uses_joker | (jokers > 0)[:, None]
+    usable = (available.astype(np.float32) @ matrix) > 0
+    usable_faces = np.where(usable, faces, 0)
+    leftover = (faces - usable_faces).sum(axis=1) + jokers
+
+    rows = np.flatnonzero(available.any(axis=1))
+    solved = [
+        _decompose_leftover(tuple(counts), jokers_left)
+        for counts, jokers_left in zip(usable_faces[rows].tolist(), jokers[rows].tolist())
+    ]
+    leftover[rows] += np.array(solved, dtype=np.int64) - jokers[rows]
+    result[pending] = leftover
+    return result
+
+
+def _pack_hand(hand: List[int], okey: int, indicator: int) -> List[Tile]:
+    """Pack ``hand`` for the grouping searches, keyed by tile position.
+
+    Fake Okey tiles become jokers showing the okey face when the indicator
+    is ``FAKE_OKEY_FACE_INDEX`` and plain ``FAKE_OKEY_FACE_INDEX`` tiles
+    otherwise.
+    """
+    def as_tile(unique_id: int, idx: int) -> Tile:
+        if idx == FAKE_OKEY_INDEX:
+            if indicator == FAKE_OKEY_FACE_INDEX:
+                return _pack_tile(okey, unique_id, True)
+            return _pack_tile(FAKE_OKEY_FACE_INDEX, unique_id, False)
+        return _pack_tile(idx, unique_id, idx == okey)
+
+    return [as_tile(i, t) for i, t in enumerate(hand)]
+
+
+def score_hand(
+    hand: List[int],
+    okey: int,
+    indicator: int,
+    *,
+    log_details: bool = False,
+    engine: str = 'search',
+    cache: Optional[ScoreCache] = None,
+) -> int:
     """Evaluate ``hand`` and return the number of tiles left ungrouped.
 
     The function builds every possible grouping of sets and runs while
-    respecting joker usage rules. If ``log_details`` is ``True`` the chosen
-    groups and remaining tiles are logged via ``logger``.
+    respecting joker usage rules. If ``log_details`` is ``True`` and ``logger``
+    is enabled for INFO, the chosen groups and remaining tiles are logged;
+    otherwise nothing is formatted.
+
+    ``engine`` selects the solver: ``"search"`` backtracks over the candidate
+    groups of the individual tiles, ``"anchored"`` always branches on the
+    lowest undecided tile and only tries the groups that can contain it,
+    ``"dp"`` runs a memoized dynamic program over the hand's face-count vector
+    and ``"decompose"`` enumerates sets per number and reads each color's runs
+    from a ``RunTable``. All engines return the same leftover count.
+
+    When ``cache`` is given, hands are looked up by their canonical form first
+    and computed results are stored there. Logged evaluations bypass the cache.
     """
+    if engine not in SCORING_ENGINES:
+        raise ValueError(f"Unknown scoring engine: {engine!r}")
+    log_details = log_details and logger.isEnabledFor(logging.INFO)
 
-    if _is_double_run(hand, okey, indicator):
+    if cache is not None and not log_details:
+        key = _canonical_key(hand, okey, indicator)
+        leftover = cache.get(key)
+        if leftover is None:
+            leftover = score_hand(hand, okey, indicator, engine=engine)
+            cache.put(key, leftover)
+        return leftover
+
+    counts, jokers = _hand_counts(hand, okey, indicator)
+    if _is_double_run_counts(counts, jokers):
         if log_details:
             logger.info("Hand is a double-run (7 pairs)")
         return 0
 
-    def as_tile(unique_id: int, idx: int) -> Tile:
-        if idx == FAKE_OKEY_INDEX:
-            if indicator == FAKE_OKEY_FACE_INDEX:
-                tile_index = okey
-                is_joker = True
-            else:
-                tile_index = FAKE_OKEY_FACE_INDEX
-                is_joker = False
-        elif idx == okey:
-            tile_index = idx
-            is_joker = True
+    if engine not in ('search', 'anchored'):
+        if engine == 'dp':
+            leftover = _dp_leftover(counts, jokers)
         else:
-            tile_index = idx
-            is_joker = False
-        num = get_number(tile_index)
-        color = get_color(tile_index)
-        return (num or 0, color, unique_id, is_joker)
+            leftover = _decompose_leftover(counts, jokers)
+        if log_details:
+            def fmt(face: Optional[int]) -> str:
+                return _format_face(okey if face is None else face)
 
-    tiles = [as_tile(i, t) for i, t in enumerate(hand)]
+            face_groups, face_remaining = _dp_grouping(counts, jokers)
+            formatted_groups = ["- " + ", ".join(fmt(f) for f in grp) for grp in face_groups]
+            logger.info("Groups:\n%s", "\n".join(formatted_groups))
+            logger.info("Ungrouped: %s", ", ".join(fmt(f) for f in face_remaining))
+        return leftover
 
-    groups, remaining = _find_best_grouping(tiles)
+    tiles = _pack_hand(hand, okey, indicator)
+    if engine == 'anchored':
+        groups, remaining, _ = _find_anchored_grouping(tiles)
+    else:
+        groups, remaining = _find_best_grouping(tiles)
 
     if log_details:
-        formatted_groups = ["- " + ", ".join(f"{t[1]}-{t[0]}" for t in grp) for grp in groups]
-        logger.info("Groups:\n" + "\n".join(formatted_groups))
-        logger.info("Ungrouped: " + ", ".join(f"{t[1]}-{t[0]}" for t in remaining))
+        formatted_groups = ["- " + ", ".join(_format_face(_tile_face(t)) for t in grp) for grp in groups]
+        logger.info("Groups:\n%s", "\n".join(formatted_groups))
+        logger.info("Ungrouped: %s", ", ".join(_format_face(_tile_face(t)) for t in remaining))
 
     return len(remaining)
 
 
-def main() -> None:
-    """Run the simulation once and print summary information."""
+class AnytimeScore(NamedTuple):
+    """Result of ``score_hand_anytime``.
+
+    ``groups`` and ``remaining`` hold tile indices as given in the hand.
+    ``optimal`` is ``False`` when the budget ran out before the search could
+    prove that no grouping leaves fewer tiles.
+    """
+
+    leftover: int
+    optimal: bool
+    groups: Tuple[Tuple[int, ...], ...]
+    remaining: Tuple[int, ...]
+
+
+def _double_run_pairs(tiles: List[Tile]) -> List[List[Tile]]:
+    """Pair the packed tiles of a double-run hand, jokers completing singles."""
+    jokers = [t for t in tiles if t & 1]
+    by_face: Dict[int, List[Tile]] = defaultdict(list)
+    for t in tiles:
+        if not t & 1:
+            by_face[_tile_face(t)].append(t)
+    pairs: List[List[Tile]] = []
+    for face in sorted(by_face):
+        copies = by_face[face]
+        while len(copies) >= 2:
+            pairs.append([copies.pop(0), copies.pop(0)])
+        if copies:
+            pairs.append([copies[0], jokers.pop()])
+    while jokers:
+        pairs.append([jokers.pop(), jokers.pop()])
+    return pairs
+
+
+def score_hand_anytime(
+    hand: List[int],
+    okey: int,
+    indicator: int,
+    *,
+    max_nodes: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> AnytimeScore:
+    """Score ``hand`` within a search budget and return the best grouping found.
+
+    The hand is solved by the ``"anchored"`` engine, seeded with a greedy
+    grouping so even a budget of a single node gives a sensible answer. The
+    search stops after ``max_nodes`` nodes or once ``time.perf_counter()``
+    reaches ``deadline``, whichever comes first; without either it runs to
+    completion and the result equals ``score_hand``. A double run is
+    returned as its seven pairs.
+    """
+    tiles = _pack_hand(hand, okey, indicator)
+    counts, jokers = _hand_counts(hand, okey, indicator)
+    remaining: List[Tile]
+    if _is_double_run_counts(counts, jokers):
+        groups, remaining, optimal = _double_run_pairs(tiles), [], True
+    else:
+        groups, remaining, optimal = _find_anchored_grouping(tiles, max_nodes, deadline)
+
+    def original(tile: Tile) -> int:
+        return hand[(tile >> 1) & ((1 << _TILE_UID_BITS) - 1)]
+
+    return AnytimeScore(
+        len(remaining),
+        optimal,
+        tuple(tuple(original(t) for t in group) for group in groups),
+        tuple(original(t) for t in remaining),
+    )
+
+
+# A finished hand holds 14 tiles: two four-tile and two three-tile melds, or
+# seven pairs.
+WINNING_HAND_SIZE: int = 14
+WINNING_MELDS: Tuple[int, ...] = (4, 4, 3, 3)
+
+# Per-color offsets that spread a four-bit color mask over one number.
+_COLOR_SPREAD: Tuple[int, ...] = tuple(
+    sum(1 << (13 * color) for color in range(4) if colors >> color & 1) for colors in range(16)
+)
+
+
+def _subsets_of_two_or_more(mask: int, longest: int) -> Set[Tuple[int, int]]:
+    """Return ``(length, submask)`` for the submasks of 2 to ``longest`` bits."""
+    bits = [1 << i for i in range(mask.bit_length()) if mask >> i & 1]
+    return {
+        (length, sum(chosen))
+        for length in range(2, min(longest, len(bits)) + 1)
+        for chosen in combinations(bits, length)
+    }
+
+
+@lru_cache(maxsize=None)
+def _run_fragments(numbers: int, size: int) -> Tuple[Tuple[int, int], ...]:
+    """Return the run fragments of one color whose present numbers are the bits of ``numbers``.
+
+    Each fragment is ``(length, mask)``: two or more of the numbers that fit
+    one run of ``size`` tiles.
+    """
+    found: Set[Tuple[int, int]] = set()
+    window = (1 << size) - 1
+    for start in range(14 - size):
+        shared = numbers & (window << start)
+        if shared & (shared - 1):
+            found |= _subsets_of_two_or_more(shared, size)
+    return tuple(found)
+
+
+@lru_cache(maxsize=None)
+def _set_fragments(colors: int, size: int) -> Tuple[Tuple[int, int], ...]:
+    """Return the set fragments of one number whose present colors are the bits of ``colors``."""
+    return tuple(_subsets_of_two_or_more(colors, size))
+
+
+def _meld_fragments(counts: Sequence[int]) -> Dict[int, List[Tuple[int, int]]]:
+    """Return the groups of two or more of the hand's faces that can share a meld.
+
+    Each entry, per meld size, is a set of distinct faces present in
+    ``counts`` that is contained in some complete meld of that size, i.e. the
+    tiles such a meld could keep while its other slots are drawn later. It is
+    given as ``(length, mask)`` with one bit per face. Single tiles fit every
+    meld and are left out. Lists are ordered largest first.
+
+    Runs only depend on which numbers of a color are present and sets on
+    which colors of a number are, so both are read from small caches.
+    """
+    rows = [0, 0, 0, 0]
+    for face in range(FAKE_OKEY_INDEX):
+        if counts[face]:
+            rows[face // 13] |= 1 << (face % 13)
+    found: Dict[int, List[Tuple[int, int]]] = {size: [] for size in WINNING_MELDS}
+    for color, numbers in enumerate(rows):
+        if numbers & (numbers - 1):
+            shift = 13 * color
+            for size, fragments in found.items():
+                fragments.extend((length, mask << shift) for length, mask in _run_fragments(numbers, size))
+    yellow, blue, black, red = rows
+    # Numbers held in at least two colors.
+    shared = (yellow | blue) & (black | red) | yellow & blue | black & red
+    while shared:
+        number = (shared & -shared).bit_length() - 1
+        shared &= shared - 1
+        colors = sum(1 << color for color in range(4) if rows[color] >> number & 1)
+        for size, fragments in found.items():
+            fragments.extend((length, _COLOR_SPREAD[mask] << number) for length, mask in _set_fragments(colors, size))
+    for fragments in found.values():
+        fragments.sort(reverse=True)
+    return found
+
+
+def _pair_reach(fragments: Sequence[Tuple[int, int]], once: int, twice: int) -> int:
+    """Return the most tiles two slots can keep from ``fragments``, largest first.
+
+    Only fragments within the ``once`` face mask count, and two of them may
+    only share faces of the ``twice`` mask; a slot without one keeps a spare
+    tile.
+    """
+    reach = 2
+    for index, (length, mask) in enumerate(fragments):
+        if 2 * length <= reach:
+            break
+        if mask & ~once:
+            continue
+        reach = max(reach, length + 1)
+        for other_length, other in fragments[index:]:
+            if length + other_length <= reach:
+                break
+            if not other & ~once and not mask & other & ~twice:
+                reach = length + other_length
+                break
+    return reach
+
+
+def _kept_in_melds(counts: Sequence[int], jokers: int) -> int:
+    """Return the most hand tiles that fit the melds of a finished hand.
+
+    Every slot of ``WINNING_MELDS`` keeps one fragment from
+    ``_meld_fragments``, a single spare tile or nothing, and unless it is
+    full may keep one joker. Only the multi-tile fragments are searched:
+    single tiles fit any slot, so the slots left without a fragment are
+    filled from the unused tiles when a branch is complete. The search fills
+    the slots in order with the largest fragments first, lets equally sized
+    slots only take fragments at or after the previous one, and cuts a branch
+    once the remaining slots cannot beat the best total found. Those are
+    bounded by the best two fragments of each size that fit the hand
+    together (``_pair_reach``), and once the four-tile slots are filled, by
+    the best two three-tile fragments left free. The last slot is not
+    searched: the first free fragment is the longest, so only it, the first
+    free one that is not full and a spare tile compete.
+
+    A fragment is also skipped while one more free face would extend it for
+    the same slot: moving that face out of a later slot keeps the total, and
+    as long as the larger fragment is not full (or there are no jokers) it
+    leaves no fewer slots open for jokers.
+
+    The free copies are tracked as face masks, ``free[k]`` holding the faces
+    with more than ``k`` unused copies; no slot takes a face twice, so copies
+    beyond one per slot never matter.
+    """
+    fragments = _meld_fragments(counts)
+    slots = len(WINNING_MELDS)
+    # One level more than any face fills, and at least two.
+    free = [0] * max(min(max(counts), slots) + 1, 2)
+    for face, count in enumerate(counts):
+        if count:
+            for level in range(min(count, slots)):
+                free[level] |= 1 << face
+    tiles = sum(counts)
+    # extensions[size][mask] holds the faces that extend that fragment.
+    extensions: Dict[int, Dict[int, int]] = {}
+    for size, candidates in fragments.items():
+        by_fragment: Dict[int, int] = defaultdict(int)
+        for length, larger in candidates:
+            if length > 2 and (jokers == 0 or length < size):
+                rest = larger
+                while rest:
+                    bit = rest & -rest
+                    rest ^= bit
+                    by_fragment[larger ^ bit] |= bit
+        extensions[size] = by_fragment
+    # Most tiles two slots of each size can keep, ignoring the other size.
+    pair_ceiling = {size: _pair_reach(candidates, free[0], free[1]) for size, candidates in fragments.items()}
+    largest = {size: f[0][0] if f else min(tiles, 1) for size, f in fragments.items()}
+    big, small = WINNING_MELDS[0], WINNING_MELDS[-1]
+    first_small = WINNING_MELDS.index(small)
+    # Most tiles the slots from each one on can add.
+    ceiling = [
+        pair_ceiling[big] + pair_ceiling[small],
+        largest[big] + pair_ceiling[small],
+        pair_ceiling[small],
+        largest[small],
+    ]
+    best = 0
+
+    def fill_last(start: int, kept: int, spare_slots: int, full: int) -> None:
+        # A longer fragment is never worse here, except that a full one
+        # shuts out a joker.
+        nonlocal best
+        joker_room = min(jokers, slots - full)
+        best = max(best, kept + min(spare_slots + 1, tiles - kept) + joker_room)
+        spare = min(spare_slots, tiles - kept)
+        free_once = free[0]
+        seen_full = seen_open = False
+        for length, mask in fragments[small][start:]:
+            if kept + length + spare + joker_room <= best:
+                break
+            is_full = length == small
+            if (seen_full if is_full else seen_open) or mask & ~free_once:
+                continue
+            value = kept + length + min(spare, tiles - kept - length)
+            best = max(best, value + min(jokers, slots - full - is_full))
+            if is_full:
+                seen_full = True
+            else:
+                seen_open = True
+            if seen_open and (seen_full or length < small - 1):
+                break
+
+    def fill(slot: int, start: int, kept: int, spare_slots: int, full: int) -> None:
+        if slot == slots - 1:
+            fill_last(start, kept, spare_slots, full)
+            return
+        joker_room = min(jokers, slots - full)
+        if kept + spare_slots + ceiling[slot] + joker_room <= best:
+            return
+        size = WINNING_MELDS[slot]
+        same_next = WINNING_MELDS[slot + 1] == size
+        last_big = slot + 1 == first_small
+        candidates = fragments[size]
+        extended = extensions[size]
+        saved = free[:]
+        for index in range(start, len(candidates)):
+            length, mask = candidates[index]
+            if kept + spare_slots + length + ceiling[slot + 1] + joker_room <= best:
+                break
+            if mask & ~saved[0] or extended.get(mask, 0) & saved[0]:
+                continue
+            for level in range(len(free) - 1):
+                free[level] = (saved[level] & ~mask) | (saved[level + 1] & mask)
+            if last_big and kept + spare_slots + length + _pair_reach(fragments[small], free[0], free[1]) + joker_room <= best:
+                continue
+            fill(slot + 1, index if same_next else 0, kept + length, spare_slots, full + (length == size))
+        free[:] = saved
+        fill(slot + 1, len(candidates) if same_next else 0, kept, spare_slots + 1, full)
+
+    fill(0, 0, 0, 0, 0)
+    return best
+
+
+def _kept_in_pairs(counts: Sequence[int], jokers: int) -> int:
+    """Return the most hand tiles that fit seven pairs."""
+    pairs = min(sum(c // 2 for c in counts), WINNING_HAND_SIZE // 2)
+    open_pairs = WINNING_HAND_SIZE // 2 - pairs
+    singles = min(sum(1 for c in counts if c % 2), open_pairs)
+    return 2 * pairs + singles + min(jokers, singles + 2 * (open_pairs - singles))
+
+
+def tiles_to_win(hand: List[int], okey: int, indicator: int) -> int:
+    """Return how many tiles of ``hand`` must be replaced to finish it.
+
+    A hand is finished when 14 of its tiles form two four-tile and two
+    three-tile melds or seven pairs; a 15-tile hand may discard its extra
+    tile. The distance is 14 minus the most hand tiles any finished hand can
+    keep, counting jokers as in ``score_hand`` and ignoring which tiles are
+    still available to draw. Unlike the leftover count of ``score_hand`` it
+    tells how many draws a hand still needs: ``0`` means it can finish now.
+    """
+    counts, jokers = _hand_counts(hand, okey, indicator)
+    kept = max(_kept_in_melds(counts, jokers), _kept_in_pairs(counts, jokers))
+    return WINNING_HAND_SIZE - kept
+
+
+class GameResult(NamedTuple):
+    """Outcome of one simulated deal."""
+
+    indicator: int
+    okey: int
+    scores: Tuple[int, ...]
+    winner: int
+    hands: Tuple[Tuple[int, ...], ...] = ()
+    distances: Tuple[int, ...] = ()
+
+
+def _play(rng: random.Random, engine: str, log_details: bool = False, winner_by: str = 'leftover') -> GameResult:
+    """Deal one game from ``rng`` and score every seat."""
+    if winner_by not in WINNER_RULES:
+        raise ValueError(f"Unknown winner rule: {winner_by!r}")
     tiles = generate_tiles()
-    indicator, okey_tile = select_indicator_and_okey(tiles)
+    indicator, okey = select_indicator_and_okey(tiles, rng)
     tiles.remove(indicator)
-    hands = distribute_tiles(tiles)
+    hands = distribute_tiles(tiles, rng)
+    scores = tuple(score_hand(hand, okey, indicator, engine=engine, log_details=log_details) for hand in hands)
+    if winner_by == 'distance':
+        distances = tuple(tiles_to_win(hand, okey, indicator) for hand in hands)
+        winner = min(range(len(hands)), key=lambda seat: (distances[seat], scores[seat]))
+    else:
+        distances = ()
+        winner = scores.index(min(scores))
+    return GameResult(indicator, okey, scores, winner, tuple(map(tuple, hands)), distances)
+
+
+def play_game(
+    seed: int, game_index: int, *, engine: str = 'decompose', log_details: bool = False, winner_by: str = 'leftover'
+) -> GameResult:
+    """Deal and score game ``game_index`` of the run seeded with ``seed``.
+
+    The game draws from ``RngStreams(seed).stream(game_index)``, so it is
+    reproduced exactly no matter which worker or chunk plays it. ``winner``
+    is the 0-based seat with the fewest ungrouped tiles, the first one on
+    ties; with ``winner_by='distance'`` it is the seat with the fewest
+    ``tiles_to_win`` (then ungrouped tiles) and ``distances`` is filled in.
+    ``log_details`` is passed on to ``score_hand`` for every seat.
+    """
+    return _play(RngStreams(seed).stream(game_index), engine, log_details, winner_by)
+
+
+# Leftover counts range from 0 to the largest hand size.
+MAX_LEFTOVER: int = max(TILES_PER_PLAYER)
+
+
+class SimulationStats:
+    """Mergeable running statistics of simulated games.
+
+    Memory stays constant however many games are added: per seat it keeps a
+    Welford mean/variance, a histogram of leftover counts and a win count,
+    plus a leftover histogram per indicator color. Accumulators filled by
+    different workers are combined with ``merge`` and can be persisted with
+    ``save``/``load``.
+    """
+
+    def __init__(self) -> None:
+        self.games = 0
+        self.means = [0.0] * NUM_PLAYERS
+        self.m2 = [0.0] * NUM_PLAYERS
+        self.wins = [0] * NUM_PLAYERS
+        self.seat_histograms = [[0] * (MAX_LEFTOVER + 1) for _ in range(NUM_PLAYERS)]
+        self.color_histograms = {
+            color: [0] * (MAX_LEFTOVER + 1) for color in COLOR_NAMES[:4]
+        }
+
+    def update(self, game: GameResult) -> None:
+        """Add one game."""
+        self.games += 1
+        color_histogram = self.color_histograms[get_color(game.indicator)]
+        for seat, score in enumerate(game.scores):
+            delta = score - self.means[seat]
+            self.means[seat] += delta / self.games
+            self.m2[seat] += delta * (score - self.means[seat])
+            self.seat_histograms[seat][score] += 1
+            color_histogram[score] += 1
+        self.wins[game.winner] += 1
+
+    def merge(self, other: 'SimulationStats') -> 'SimulationStats':
+        """Fold ``other`` into this accumulator and return ``self``."""
+        total = self.games + other.games
+        if other.games:
+            for seat in range(NUM_PLAYERS):
+                delta = other.means[seat] - self.means[seat]
+                self.means[seat] += delta * other.games / total
+                self.m2[seat] += other.m2[seat] + delta * delta * self.games * other.games / total
+                self.wins[seat] += other.wins[seat]
+                for score, count in enumerate(other.seat_histograms[seat]):
+                    self.seat_histograms[seat][score] += count
+            for color, histogram in other.color_histograms.items():
+                for score, count in enumerate(histogram):
+                    self.color_histograms[color][score] += count
+        self.games = total
+        return self
+
+    def variance(self, seat: int) -> float:
+        """Sample variance of the leftover count of ``seat``."""
+        return self.m2[seat] / (self.games - 1) if self.games > 1 else 0.0
+
+    def win_rate(self, seat: int) -> float:
+        """Fraction of games won by ``seat``."""
+        return self.wins[seat] / self.games if self.games else 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        """Return a JSON-serializable snapshot."""
+        return {
+            'games': self.games,
+            'means': list(self.means),
+            'm2': list(self.m2),
+            'wins': list(self.wins),
+            'seat_histograms': [list(h) for h in self.seat_histograms],
+            'color_histograms': {c: list(h) for c, h in self.color_histograms.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SimulationStats':
+        """Rebuild an accumulator from ``to_dict`` output."""
+        stats = cls()
+        stats.games = int(data['games'])
+        stats.means = [float(m) for m in data['means']]
+        stats.m2 = [float(m) for m in data['m2']]
+        stats.wins = [int(w) for w in data['wins']]
+        stats.seat_histograms = [[int(c) for c in h] for h in data['seat_histograms']]
+        stats.color_histograms = {str(color): [int(c) for c in h] for color, h in data['color_histograms'].items()}
+        return stats
+
+    def save(self, path: str) -> None:
+        """Write the accumulator to ``path`` as JSON."""
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(self.to_dict(), fh)
+
+    @classmethod
+    def load(cls, path: str) -> 'SimulationStats':
+        """Read an accumulator written by ``save``."""
+        with open(path, encoding='utf-8') as fh:
+            data: Dict[str, Any] = json.load(fh)
+        return cls.from_dict(data)
+
+
+class Metric(NamedTuple):
+    """Quantity estimated from ``SimulationStats`` with its standard error.
+
+    Proportions also provide ``counts``, returning ``(successes, trials)``;
+    their intervals use the Wilson score, which stays wide when no or every
+    game succeeded instead of collapsing to zero width.
+    """
+
+    name: str
+    estimate: Callable[[SimulationStats], Tuple[float, float]]
+    counts: Optional[Callable[[SimulationStats], Tuple[int, int]]] = None
+
+    def interval(self, stats: SimulationStats, confidence: float = 0.95) -> Tuple[float, float]:
+        """Return the confidence interval of the metric.
+
+        The Wilson score interval for proportions, the normal approximation
+        otherwise.
+        """
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        if self.counts is not None:
+            successes, trials = self.counts(stats)
+            if not trials:
+                return 0.0, 1.0
+            p = successes / trials
+            scale = 1 + z * z / trials
+            center = (p + z * z / (2 * trials)) / scale
+            half = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / scale
+            return center - half, center + half
+        value, error = self.estimate(stats)
+        return value - z * error, value + z * error
+
+
+def mean_leftover(seat: int) -> Metric:
+    """Metric for the mean ungrouped tiles of ``seat`` (0-based).
+
+    Metrics are named after the 1-based player, e.g. ``mean_leftover:1``.
+    Leftovers are whole tiles, so the standard error is never taken below
+    ``1 / games``; a seat whose leftovers have not varied yet does not look
+    precise.
+    """
+
+    def estimate(stats: SimulationStats) -> Tuple[float, float]:
+        if not stats.games:
+            return stats.means[seat], math.inf
+        return stats.means[seat], max(math.sqrt(stats.variance(seat) / stats.games), 1 / stats.games)
+
+    return Metric(f"mean_leftover:{seat + 1}", estimate)
+
+
+def win_probability(seat: int) -> Metric:
+    """Metric for the probability that ``seat`` (0-based) is closest to winning."""
+
+    def estimate(stats: SimulationStats) -> Tuple[float, float]:
+        p = stats.win_rate(seat)
+        return p, math.sqrt(p * (1 - p) / stats.games) if stats.games else math.inf
+
+    def counts(stats: SimulationStats) -> Tuple[int, int]:
+        return stats.wins[seat], stats.games
+
+    return Metric(f"win_probability:{seat + 1}", estimate, counts)
+
 
-    logger.info(f"Indicator : {indicator} -> {get_color(indicator)}-{get_number(indicator)}")
-    logger.info(f"Okey tile: {okey_tile} -> {get_color(okey_tile)}-{get_number(okey_tile)}")
+class SimulationResult(NamedTuple):
+    """Aggregated outcome of ``simulate``."""
 
-    scores = []
-    for idx, hand in enumerate(hands, start=1):
-        remaining = score_hand(hand, okey_tile, indicator, log_details=True)
-        scores.append((idx, remaining))
-        logger.info(f"Player {idx}: {remaining} ungrouped tiles")
+    stats: SimulationStats
+    seconds: float
+    converged: bool = False
+
+    @property
+    def games(self) -> int:
+        """Number of games played."""
+        return self.stats.games
+
+    @property
+    def deals_per_second(self) -> float:
+        """Throughput of the run."""
+        return self.games / self.seconds if self.seconds else 0.0
+
+
+def _simulate_chunk(task: Tuple[int, int, int, str, int, str]) -> SimulationStats:
+    """Play games ``start``–``stop`` and return their statistics.
+
+    Every ``log_every``-th game (by game index) is played with
+    ``log_details``; ``0`` logs none.
+    """
+    seed, start, stop, engine, log_every, winner_by = task
+    if not logger.isEnabledFor(logging.INFO):
+        log_every = 0
+    stats = SimulationStats()
+    for game_index in range(start, stop):
+        sampled = log_every > 0 and game_index % log_every == 0
+        game = play_game(seed, game_index, engine=engine, log_details=sampled, winner_by=winner_by)
+        if sampled:
+            logger.info("Game %d: scores %s, winner Player %d", game_index, game.scores, game.winner + 1)
+        stats.update(game)
+    return stats
+
+
+def _precise_enough(
+    stats: SimulationStats, metrics: Sequence[Metric], target_width: float, confidence: float
+) -> bool:
+    """Return whether every metric's confidence interval is at most ``target_width`` wide."""
+    for metric in metrics:
+        low, high = metric.interval(stats, confidence)
+        if high - low > target_width:
+            return False
+    return True
+
+
+def _write_checkpoint(path: str, state: Dict[str, object]) -> None:
+    """Atomically write ``state`` as JSON to ``path``."""
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as fh:
+        json.dump(state, fh)
+    os.replace(temporary, path)
+
+
+def simulate(
+    games: int,
+    *,
+    workers: int = 1,
+    seed: int = 0,
+    chunk_size: int = 1000,
+    engine: str = 'decompose',
+    target_width: Optional[float] = None,
+    metrics: Sequence[Metric] = (),
+    confidence: float = 0.95,
+    min_games: int = 100,
+    checkpoint: Optional[str] = None,
+    checkpoint_every: int = 10,
+    resume: bool = False,
+    log_every: int = 0,
+    winner_by: str = 'leftover',
+) -> SimulationResult:
+    """Play up to ``games`` independent deals and aggregate the results.
+
+    Games are split into chunks of ``chunk_size`` consecutive game indices
+    and spread over a pool of ``workers`` processes; with one worker they run
+    in the calling process. Each chunk fills its own ``SimulationStats`` and
+    chunks are merged in order as they complete, so memory does not grow
+    with ``games``. Game ``i`` always uses the stream
+    ``RngStreams(seed).stream(i)``, so the result does not depend on the
+    number of workers.
+
+    With ``target_width`` set, ``games`` is an upper limit: after each merged
+    chunk, once at least ``min_games`` games were played, the run stops as
+    soon as the ``confidence`` interval of every metric in ``metrics`` is no
+    wider than ``target_width``. The result's ``converged`` flag tells
+    whether that happened.
+
+    With ``checkpoint`` set, the merged statistics and the number of
+    completed chunks are written to that file every ``checkpoint_every``
+    chunks and at the end. ``resume=True`` continues from an existing
+    checkpoint (or starts fresh if there is none); because every game has its
+    own stream and chunks are merged in the same order, the resumed run ends
+    with exactly the statistics of an uninterrupted one. The checkpoint
+    records the run's settings, including the stopping rule, and resuming
+    with different ones raises ``ValueError``. ``seconds`` only covers the
+    current invocation.
+
+    ``log_every=K`` logs the groupings of one game in ``K`` (those whose
+    index is a multiple of ``K``) at INFO level, so a long run can be spot
+    checked without paying for formatting on every hand. Sampling is by game
+    index and therefore the same for any number of workers.
+
+    ``winner_by`` picks the rule for the win counts, as in ``play_game``.
+    """
+    if games < 0 or workers < 1 or chunk_size < 1 or checkpoint_every < 1 or log_every < 0:
+        raise ValueError(
+            "games and log_every must be non-negative and workers, chunk_size and checkpoint_every positive"
+        )
+    if target_width is not None and not metrics:
+        raise ValueError("target_width needs at least one metric")
+    if resume and checkpoint is None:
+        raise ValueError("resume needs a checkpoint path")
+    if winner_by not in WINNER_RULES:
+        raise ValueError(f"Unknown winner rule: {winner_by!r}")
+    tasks = [
+        (seed, start, min(start + chunk_size, games), engine, log_every, winner_by)
+        for start in range(0, games, chunk_size)
+    ]
+
+    stats = SimulationStats()
+    completed = 0
+    config = {'games': games, 'seed': seed, 'chunk_size': chunk_size, 'engine': engine}
+    if winner_by != 'leftover':
+        config['winner_by'] = winner_by
+    if target_width is not None:
+        config['stopping'] = {
+            'metrics': [metric.name for metric in metrics],
+            'target_width': target_width,
+            'confidence': confidence,
+            'min_games': min_games,
+        }
+    if resume and os.path.exists(checkpoint):  # type: ignore[arg-type]
+        with open(checkpoint, encoding='utf-8') as fh:  # type: ignore[arg-type]
+            state = json.load(fh)
+        if state['config'] != config:
+            raise ValueError(f"Checkpoint {checkpoint} was written for {state['config']}, not {config}")
+        stats = SimulationStats.from_dict(state['stats'])
+        completed = state['completed_chunks']
+        if state['converged']:
+            return SimulationResult(stats, 0.0, True)
+
+    def save(converged: bool) -> None:
+        if checkpoint is not None:
+            _write_checkpoint(checkpoint, {
+                'config': config,
+                'completed_chunks': completed,
+                'converged': converged,
+                'stats': stats.to_dict(),
+            })
+
+    def merge_all(chunks: Iterator[SimulationStats]) -> bool:
+        nonlocal completed
+        for chunk in chunks:
+            stats.merge(chunk)
+            completed += 1
+            if (
+                target_width is not None
+                and stats.games >= min_games
+                and _precise_enough(stats, metrics, target_width, confidence)
+            ):
+                return True
+            if completed % checkpoint_every == 0:
+                save(False)
+        return False
+
+    began = time.perf_counter()
+    pending = tasks[completed:]
+    if workers == 1:
+        converged = merge_all(map(_simulate_chunk, pending))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            converged = merge_all(pool.imap(_simulate_chunk, pending))
+    save(converged)
+    return SimulationResult(stats, time.perf_counter() - began, converged)
+
+
+def _cmd_deal(args: argparse.Namespace) -> Dict[str, object]:
+    """Deal and score a single game, logging the groupings at INFO level."""
+    seed = random.randrange(2 ** 32) if args.seed is None else args.seed
+    game = _play(RngStreams(seed).stream(0), args.engine, log_details=True, winner_by=args.winner)
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Indicator : %d -> %s", game.indicator, _format_face(game.indicator))
+        logger.info("Okey tile: %d -> %s", game.okey, _format_face(game.okey))
+        for idx, remaining in enumerate(game.scores, start=1):
+            logger.info("Player %d: %d ungrouped tiles", idx, remaining)
+        for idx, distance in enumerate(game.distances, start=1):
+            logger.info("Player %d: %d tiles to win", idx, distance)
+        logger.info("Best hand: Player %d with %d ungrouped tiles", game.winner + 1, game.scores[game.winner])
+
+    output: Dict[str, object] = {
+        'seed': seed,
+        'indicator': game.indicator,
+        'okey': game.okey,
+        'hands': [list(hand) for hand in game.hands],
+        'scores': list(game.scores),
+        'winner': game.winner + 1,
+    }
+    if game.distances:
+        output['tiles_to_win'] = list(game.distances)
+    return output
+
+
+def _cmd_score(args: argparse.Namespace) -> Dict[str, object]:
+    """Score the tiles given on the command line."""
+    leftover = score_hand(args.tiles, args.okey, args.indicator, engine=args.engine, log_details=True)
+    return {'leftover': leftover}
+
+
+def _parse_tile(text: str) -> int:
+    """Parse a tile index ``0``–``FAKE_OKEY_INDEX``."""
+    if not text.isdigit() or int(text) > FAKE_OKEY_INDEX:
+        raise argparse.ArgumentTypeError(f"expected a tile index 0-{FAKE_OKEY_INDEX}, got {text!r}")
+    return int(text)
+
+
+def _parse_metric(text: str) -> Metric:
+    """Parse ``mean_leftover:SEAT`` or ``win_probability:SEAT`` (1-based seat)."""
+    factories = {'mean_leftover': mean_leftover, 'win_probability': win_probability}
+    name, _, seat = text.partition(':')
+    if name not in factories or not seat.isdigit() or not 1 <= int(seat) <= NUM_PLAYERS:
+        raise argparse.ArgumentTypeError(f"expected mean_leftover:SEAT or win_probability:SEAT, got {text!r}")
+    return factories[name](int(seat) - 1)
+
+
+def _cmd_simulate(args: argparse.Namespace) -> Dict[str, object]:
+    """Run a Monte Carlo simulation and summarize it."""
+    result = simulate(
+        args.games,
+        workers=args.workers,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        engine=args.engine,
+        target_width=args.target_width,
+        metrics=args.metric,
+        confidence=args.confidence,
+        checkpoint=args.checkpoint,
+        resume=args.resume,
+        log_every=args.log_every,
+        winner_by=args.winner,
+    )
+    stats = result.stats
+    return {
+        'games': result.games,
+        'seconds': round(result.seconds, 3),
+        'deals_per_second': round(result.deals_per_second, 1),
+        'converged': result.converged,
+        'mean_leftover': [round(m, 4) for m in stats.means],
+        'win_rate': [round(stats.win_rate(seat), 4) for seat in range(NUM_PLAYERS)],
+        'intervals': {m.name: [round(x, 4) for x in m.interval(stats, args.confidence)] for m in args.metric},
+    }
+
+
+def _cmd_bench(args: argparse.Namespace) -> Dict[str, object]:
+    """Measure scoring throughput of each engine on the same random hands."""
+    streams = RngStreams(args.seed)
+    hands, okeys, indicators = [], [], []
+    for i in range(args.hands):
+        rng = streams.stream(i)
+        tiles = generate_tiles()
+        indicator, okey = select_indicator_and_okey(tiles, rng)
+        tiles.remove(indicator)
+        hands.append(distribute_tiles(tiles, rng)[i % NUM_PLAYERS])
+        okeys.append(okey)
+        indicators.append(indicator)
+
+    rates: Dict[str, float] = {}
+    for engine in args.engine or SCORING_ENGINES:
+        began = time.perf_counter()
+        for hand, okey, indicator in zip(hands, okeys, indicators):
+            score_hand(hand, okey, indicator, engine=engine)
+        rates[engine] = round(args.hands / (time.perf_counter() - began), 1)
+    if np is not None and not args.engine:
+        padded = [hand + [PAD_TILE] * (max(TILES_PER_PLAYER) - len(hand)) for hand in hands]
+        began = time.perf_counter()
+        score_batch(np.array(padded, dtype=np.uint8), okeys, indicators)
+        rates['batch'] = round(args.hands / (time.perf_counter() - began), 1)
+    return {'hands': args.hands, 'hands_per_second': rates}
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Return the command-line parser."""
+    parser = argparse.ArgumentParser(
+        prog='python -m okey_game_simulation',
+        description="Deal, score and simulate four-player Okey games.",
+    )
+    parser.add_argument('--format', choices=('text', 'json'), default='text', help="output format")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log per-hand details at INFO level")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    deal = commands.add_parser('deal', help="deal and score one game")
+    deal.add_argument('--seed', type=int, help="seed for the deal (random if omitted)")
+    deal.add_argument('--engine', choices=SCORING_ENGINES, default='search')
+    deal.add_argument('--winner', choices=WINNER_RULES, default='leftover', help="how the winner is picked")
+    deal.set_defaults(handler=_cmd_deal)
+
+    score = commands.add_parser('score', help="score one hand given as tile indices")
+    score.add_argument('tiles', type=_parse_tile, nargs='+', help="tile indices 0-52")
+    score.add_argument('--okey', type=_parse_tile, required=True)
+    score.add_argument('--indicator', type=_parse_tile, required=True)
+    score.add_argument('--engine', choices=SCORING_ENGINES, default='decompose')
+    score.set_defaults(handler=_cmd_score)
+
+    sim = commands.add_parser('simulate', help="run a Monte Carlo simulation")
+    sim.add_argument('--games', type=int, required=True, help="number of games (upper limit with --target-width)")
+    sim.add_argument('--workers', type=int, default=1)
+    sim.add_argument('--seed', type=int, default=0)
+    sim.add_argument('--chunk-size', type=int, default=1000)
+    sim.add_argument('--engine', choices=SCORING_ENGINES, default='decompose')
+    sim.add_argument('--winner', choices=WINNER_RULES, default='leftover', help="how win counts are assigned")
+    sim.add_argument('--target-width', type=float, help="stop once every metric interval is this narrow")
+    sim.add_argument(
+        '--metric', type=_parse_metric, action='append', default=[],
+        help="mean_leftover:SEAT or win_probability:SEAT (1-based), repeatable",
+    )
+    sim.add_argument('--confidence', type=float, default=0.95)
+    sim.add_argument('--checkpoint', help="file to save progress to")
+    sim.add_argument('--resume', action='store_true', help="continue from --checkpoint")
+    sim.add_argument(
+        '--log-every', type=int, default=0, metavar='K',
+        help="with -v, log the groupings of one game in K",
+    )
+    sim.set_defaults(handler=_cmd_simulate)
+
+    bench = commands.add_parser('bench', help="measure scoring throughput")
+    bench.add_argument('--hands', type=int, default=2000)
+    bench.add_argument('--seed', type=int, default=0)
+    bench.add_argument('--engine', choices=SCORING_ENGINES, action='append', help="engine to time, repeatable")
+    bench.set_defaults(handler=_cmd_bench)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; run ``python -m okey_game_simulation --help``.
+
+    Without arguments a single game is dealt, as in earlier versions. Logging
+    is configured here only; importing the module leaves it untouched.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    parser = _build_parser()
+    args = parser.parse_args(argv or ['deal'])
+    logging.basicConfig(format="%(asctime)s %(levelname)s:%(message)s")
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    try:
+        output = args.handler(args)
+    except (ValueError, OSError) as exc:
+        parser.error(str(exc))
 
-    winner = min(scores, key=lambda x: x[1])
-    logger.info(f"Best hand: Player {winner[0]} with {winner[1]} ungrouped tiles")
+    if args.format == 'json':
+        print(json.dumps(output))
+    else:
+        for key, value in output.items():
+            print(f"{key}: {value}")
+    return 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
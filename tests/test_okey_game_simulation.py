@@ -1,20 +1,54 @@
+import json
+import logging
 import sys
 import os
+import random
+import subprocess
 import pytest
 
 # Ensure project root is in path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import okey_game_simulation
 from okey_game_simulation import (
     generate_tiles,
     get_color,
     get_number,
     select_indicator_and_okey,
     distribute_tiles,
+    deal_batch,
+    RngStreams,
+    play_game,
+    simulate,
+    SimulationStats,
+    mean_leftover,
+    win_probability,
+    main,
     score_hand,
+    score_hand_anytime,
+    tiles_to_win,
+    best_discards,
+    score_batch,
+    double_run_batch,
+    tile_color_ids,
+    tile_numbers,
+    okeys_for,
+    COLOR_NAMES,
+    OKEY_FOR_INDICATOR,
     FAKE_OKEY_INDEX,
     FAKE_OKEY_FACE_INDEX,
     TILES_PER_PLAYER,
+    PAD_TILE,
+    HandEvaluator,
+    RunTable,
+    ScoreCache,
+    _MELD_PATTERNS,
+    _find_best_grouping,
+    _generate_all_groups,
+    _pack_tile,
+    _run_fragments,
+    _set_fragments,
+    _tile_face,
 )
 
 
@@ -52,6 +86,11 @@ def test_get_color_and_number():
     # Fake Okey
     assert get_color(FAKE_OKEY_INDEX) == 'fake'
     assert get_number(FAKE_OKEY_INDEX) is None
+    for index in (-1, FAKE_OKEY_INDEX + 1):
+        with pytest.raises(IndexError):
+            get_color(index)
+        with pytest.raises(IndexError):
+            get_number(index)
 
 
 def test_select_indicator_and_okey_never_fake():
@@ -136,3 +175,502 @@ def test_fake_okey_joker_when_indicator_matches():
     hand = [0, 2, 4, 52]
     leftover = score_hand(hand, okey=1, indicator=FAKE_OKEY_FACE_INDEX)
     assert leftover == 1
+
+
+def test_duplicate_runs_grouped_separately():
+    """Both copies of a run are grouped independently."""
+    hand = [0, 1, 2, 0, 1, 2]
+    for engine in ('search', 'dp'):
+        leftover = score_hand(hand, okey=FAKE_OKEY_INDEX, indicator=FAKE_OKEY_FACE_INDEX + 1, engine=engine)
+        assert leftover == 0, engine
+
+
+def test_joker_may_replace_present_tile():
+    """A joker can stand in for a tile the hand holds so that tile joins another group."""
+    # yellow 1-2-3, blue 3, black 3 and a joker: yellow 1-2-joker and a set of 3s.
+    hand = [0, 1, 2, 15, 28, 52]
+    for engine in ('search', 'dp'):
+        leftover = score_hand(hand, okey=40, indicator=FAKE_OKEY_FACE_INDEX, engine=engine)
+        assert leftover == 0, engine
+
+
+def test_search_finds_perfect_grouping_with_duplicates():
+    """A fully grouped hand with duplicates and a joker scores zero."""
+    hand = [0, 1, 2, 3, 4, 5, 0, 1, 2, 3, 4, 5, 13, 26, 52]
+    leftover = score_hand(hand, okey=7, indicator=FAKE_OKEY_FACE_INDEX)
+    assert leftover == 0
+
+
+def test_dp_engine_matches_search_engine():
+    """The memoized DP engine returns the same leftover count as the search."""
+    rng = random.Random(7)
+    for _ in range(40):
+        deck = generate_tiles()
+        rng.shuffle(deck)
+        hand = deck[:14]
+        indicator = rng.randrange(FAKE_OKEY_INDEX)
+        okey = rng.choice([t for t in hand if t != FAKE_OKEY_INDEX])
+        expected = score_hand(hand, okey, indicator, engine='search')
+        assert score_hand(hand, okey, indicator, engine='dp') == expected
+
+
+def test_decompose_engine_matches_dp_engine():
+    """Per-color decomposition with the run table agrees with the DP engine."""
+    rng = random.Random(11)
+    for _ in range(40):
+        deck = generate_tiles()
+        rng.shuffle(deck)
+        hand = deck[:15]
+        indicator = rng.randrange(FAKE_OKEY_INDEX)
+        okey = rng.choice([t for t in hand if t != FAKE_OKEY_INDEX])
+        expected = score_hand(hand, okey, indicator, engine='dp')
+        assert score_hand(hand, okey, indicator, engine='decompose') == expected
+
+
+def test_anchored_engine_matches_search_engine():
+    """The anchored exact-cover engine agrees with the search on two-joker hands."""
+    rng = random.Random(13)
+    for _ in range(40):
+        faces = rng.sample(range(FAKE_OKEY_INDEX), 10) * 2
+        okey = rng.randrange(FAKE_OKEY_INDEX)
+        hand = rng.sample(faces, 13) + [okey, okey]
+        indicator = rng.randrange(FAKE_OKEY_INDEX)
+        expected = score_hand(hand, okey, indicator, engine='search')
+        assert score_hand(hand, okey, indicator, engine='anchored') == expected
+
+
+def test_anytime_scoring_respects_budget():
+    """Tiny budgets return a valid greedy grouping; full runs are proven optimal."""
+    rng = random.Random(17)
+    for _ in range(40):
+        faces = rng.sample(range(FAKE_OKEY_INDEX), 12) * 2
+        okey = rng.randrange(FAKE_OKEY_INDEX)
+        hand = rng.sample(faces, 14) + [okey]
+        indicator = rng.randrange(FAKE_OKEY_INDEX)
+        expected = score_hand(hand, okey, indicator, engine='dp')
+
+        full = score_hand_anytime(hand, okey, indicator)
+        assert (full.leftover, full.optimal) == (expected, True)
+
+        quick = score_hand_anytime(hand, okey, indicator, max_nodes=1)
+        assert quick.leftover >= expected
+        assert quick.leftover == len(quick.remaining)
+        assert sorted([t for g in quick.groups for t in g] + list(quick.remaining)) == sorted(hand)
+        assert quick.optimal is False or quick.leftover == expected
+
+
+def test_tiles_to_win_counts_missing_tiles():
+    """The distance counts the tiles a hand must replace to finish."""
+    finished = [0, 1, 2, 13, 14, 15, 26, 27, 28, 29, 39, 40, 41, 42]
+    assert tiles_to_win(finished, okey=FAKE_OKEY_INDEX, indicator=5) == 0
+    assert tiles_to_win(finished + [7], okey=FAKE_OKEY_INDEX, indicator=5) == 0
+    assert tiles_to_win(finished[:-1] + [44], okey=FAKE_OKEY_INDEX, indicator=5) == 1
+    # The joker stands in for the missing red 4.
+    assert tiles_to_win(finished[:-1] + [44], okey=44, indicator=43) == 0
+    pairs = [0, 0, 14, 14, 20, 20, 31, 31, 33, 33, 45, 45, 50, 11]
+    # Nothing is grouped, yet one more pair finishes the hand.
+    assert score_hand(pairs, okey=FAKE_OKEY_INDEX, indicator=5) == 14
+    assert tiles_to_win(pairs, okey=FAKE_OKEY_INDEX, indicator=5) == 1
+
+
+def test_tiles_to_win_reuses_fragment_caches():
+    """Meld fragments are built once per color row and number column."""
+    hand = [0, 1, 2, 4, 13, 14, 16, 26, 27, 30, 39, 40, 41, 42]
+    _run_fragments.cache_clear()
+    _set_fragments.cache_clear()
+    distance = tiles_to_win(hand, okey=FAKE_OKEY_INDEX, indicator=5)
+    runs, sets = _run_fragments.cache_info(), _set_fragments.cache_info()
+    assert runs.misses > 0 and sets.misses > 0
+    assert tiles_to_win(list(reversed(hand)), okey=FAKE_OKEY_INDEX, indicator=5) == distance
+    assert _run_fragments.cache_info().misses == runs.misses
+    assert _set_fragments.cache_info().misses == sets.misses
+    # Yellow and blue swapped: every color row is seen before.
+    swapped = [(t + 13) % 26 if t < 26 else t for t in hand]
+    assert tiles_to_win(swapped, okey=FAKE_OKEY_INDEX, indicator=5) == distance
+    assert _run_fragments.cache_info().misses == runs.misses
+    assert _run_fragments.cache_info().hits >= 2 * runs.misses
+
+
+def test_distance_winner_rule():
+    """``winner_by='distance'`` picks the seat with the fewest tiles to win."""
+    for index in range(20):
+        game = play_game(3, index, winner_by='distance')
+        assert len(game.distances) == len(game.scores)
+        best = min(zip(game.distances, game.scores))
+        assert (game.distances[game.winner], game.scores[game.winner]) == best
+    assert play_game(3, 0).distances == ()
+    with pytest.raises(ValueError):
+        play_game(3, 0, winner_by='magic')
+
+
+def test_run_table_lookup():
+    """Run table entries count leftover tiles of one color, including jokers."""
+    table = RunTable()
+    yellow_1_to_5 = sum(3 ** i for i in range(5))
+    assert table.lookup(yellow_1_to_5, 0) == 1
+    assert table.lookup(yellow_1_to_5, 1) == 0
+    assert table.lookup(0, 2) == 2
+    with pytest.raises(ValueError):
+        RunTable(bytes(10))
+
+
+def test_score_hand_rejects_unknown_engine():
+    """An unknown engine name raises ``ValueError``."""
+    with pytest.raises(ValueError):
+        score_hand([0, 1, 2], okey=FAKE_OKEY_INDEX, indicator=FAKE_OKEY_FACE_INDEX, engine='magic')
+
+
+def test_meld_pattern_table_covers_sets_and_runs():
+    """The compiled pattern table holds every set and run exactly once."""
+    patterns = [p for by_face in _MELD_PATTERNS for p in by_face]
+    assert len(patterns) == len(set(patterns))
+    plain = [faces for faces, uses_joker in patterns if not uses_joker]
+    # 13 numbers x (4 three-color + 1 four-color sets), 4 colors x (11 + 10) runs.
+    assert len(plain) == 13 * 5 + 4 * 21
+    assert ((0, 1, 2), False) in _MELD_PATTERNS[0]
+    assert ((0, 13), True) in _MELD_PATTERNS[0]
+
+
+def test_candidates_are_generated_once_per_face_pattern():
+    """Duplicate copies of a face do not multiply the candidate groups."""
+    faces = [0, 13, 26, 39] * 2
+    tiles = [_pack_tile(face, uid, False) for uid, face in enumerate(faces)]
+    jokers = [_pack_tile(7, 8, True), _pack_tile(7, 9, True)]
+    assert len(_generate_all_groups(tiles, [])) == 5
+    # Each three- or four-color set plus the six two-color sets with a joker.
+    assert len(_generate_all_groups(tiles, jokers)) == 5 + 4 + 6
+    assert score_hand(faces, okey=FAKE_OKEY_INDEX, indicator=1, engine='search') == 0
+
+
+def test_search_grouping_is_independent_of_tile_order():
+    """The search picks the same groups whatever order the tiles come in."""
+    rng = random.Random(5)
+    faces = [0, 1, 2, 3, 0, 1, 2, 13, 26, 39, 13, 14, 15, 30]
+
+    def grouped_faces(order):
+        tiles = [_pack_tile(face, uid, face == 30) for uid, face in enumerate(order)]
+        groups, remaining = _find_best_grouping(tiles)
+        return sorted(sorted(_tile_face(t) for t in g) for g in groups), sorted(map(_tile_face, remaining))
+
+    expected = grouped_faces(faces)
+    assert len(expected[1]) == 0
+    for _ in range(10):
+        rng.shuffle(faces)
+        assert grouped_faces(faces) == expected
+
+
+def test_score_cache_shares_color_permuted_hands():
+    """Reordered and color-permuted hands hit the same cache entry."""
+    cache = ScoreCache(maxsize=2)
+    hand = [0, 1, 2, 13, 13]
+    assert score_hand(hand, FAKE_OKEY_INDEX, FAKE_OKEY_FACE_INDEX + 1, cache=cache) == 2
+    # Same hand with yellow and blue swapped and the tiles shuffled.
+    swapped = [0, 0, 15, 13, 14]
+    assert score_hand(swapped, FAKE_OKEY_INDEX, FAKE_OKEY_FACE_INDEX + 1, cache=cache) == 2
+    info = cache.info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+    score_hand([0, 13, 26], FAKE_OKEY_INDEX, FAKE_OKEY_FACE_INDEX + 1, cache=cache)
+    score_hand([5, 6, 7], FAKE_OKEY_INDEX, FAKE_OKEY_FACE_INDEX + 1, cache=cache)
+    info = cache.info()
+    assert info.evictions == 1 and info.currsize == 2
+
+
+def test_hand_evaluator_tracks_draws_and_discards():
+    """Incremental scoring matches a fresh ``score_hand`` after every change."""
+    rng = random.Random(3)
+    deck = generate_tiles()
+    rng.shuffle(deck)
+    hand, wall = deck[:14], deck[14:40]
+    indicator, okey = 4, 5
+    evaluator = HandEvaluator(hand, okey, indicator)
+    assert evaluator.score() == score_hand(hand, okey, indicator)
+    for tile in wall:
+        evaluator.add(tile)
+        evaluator.remove(evaluator.hand[rng.randrange(15)])
+        assert evaluator.score() == score_hand(evaluator.hand, okey, indicator)
+    with pytest.raises(ValueError):
+        HandEvaluator([0, 1], okey, indicator).remove(2)
+
+
+def test_hand_evaluator_with_jokers_and_uneven_changes():
+    """Scores stay exact with jokers, fake Okeys and runs of adds or removes."""
+    rng = random.Random(11)
+    okey, indicator = 1, FAKE_OKEY_FACE_INDEX
+    for _ in range(20):
+        deck = generate_tiles()
+        rng.shuffle(deck)
+        evaluator = HandEvaluator(deck[:12], okey, indicator)
+        for tile in deck[12:30]:
+            if len(evaluator.hand) > 10 and rng.random() < 0.5:
+                evaluator.remove(evaluator.hand[rng.randrange(len(evaluator.hand))])
+            else:
+                evaluator.add(tile)
+            assert evaluator.score() == score_hand(evaluator.hand, okey, indicator)
+    assert HandEvaluator([52, 5], okey, indicator).face(52) is None
+
+    # Drawing the joker back into this hand lowers its score by three.
+    hand = [21, 24, 7, 14, 32, 33, 20, 51, 21, 43, 22, 18, 13, 29, 52]
+    expected = [score_hand(hand[:i] + hand[i + 1:], 14, 13, engine='dp') for i in range(15)]
+    assert best_discards(hand, 14, 13) == expected
+
+
+def test_best_discards_matches_individual_scores():
+    """Every discard is scored as if the 14-tile remainder were scored alone."""
+    rng = random.Random(5)
+    for _ in range(5):
+        deck = generate_tiles()
+        rng.shuffle(deck)
+        hand = deck[:15]
+        expected = [score_hand(hand[:i] + hand[i + 1:], 1, 0) for i in range(15)]
+        assert best_discards(hand, 1, 0) == expected
+
+
+def test_score_batch_matches_score_hand():
+    """Batch scoring agrees with ``score_hand`` for index and count inputs."""
+    np = pytest.importorskip('numpy')
+    rng = random.Random(9)
+    hands, okeys, indicators, expected = [], [], [], []
+    for i in range(60):
+        deck = generate_tiles()
+        rng.shuffle(deck)
+        hand = deck[:TILES_PER_PLAYER[i % 2]]
+        indicator = rng.randrange(FAKE_OKEY_INDEX)
+        okey = rng.randrange(FAKE_OKEY_INDEX)
+        hands.append(hand + [PAD_TILE] * (15 - len(hand)))
+        okeys.append(okey)
+        indicators.append(indicator)
+        expected.append(score_hand(hand, okey, indicator))
+    # A double run resolved without any search.
+    hands.append([0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, PAD_TILE])
+    okeys.append(FAKE_OKEY_INDEX)
+    indicators.append(FAKE_OKEY_FACE_INDEX)
+    expected.append(0)
+
+    index_array = np.array(hands, dtype=np.uint8)
+    assert score_batch(index_array, okeys, indicators).tolist() == expected
+
+    counts = np.zeros((len(hands), FAKE_OKEY_INDEX + 1), dtype=np.int64)
+    for row, hand in enumerate(hands):
+        for tile in hand:
+            if tile != PAD_TILE:
+                counts[row, tile] += 1
+    assert score_batch(counts, np.array(okeys), np.array(indicators)).tolist() == expected
+
+
+def test_double_run_batch_flags_seven_pairs():
+    """Batched seven-pairs detection handles jokers and hand size."""
+    np = pytest.importorskip('numpy')
+    hands = np.array([
+        [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, PAD_TILE],
+        [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 52, PAD_TILE],
+        [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 7, PAD_TILE],
+        [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7],
+    ], dtype=np.uint8)
+    flags = double_run_batch(hands, okeys=30, indicators=FAKE_OKEY_FACE_INDEX)
+    assert flags.tolist() == [True, True, False, False]
+    assert score_batch(hands[:2], 30, FAKE_OKEY_FACE_INDEX).tolist() == [0, 0]
+
+
+def test_okey_for_indicator_wraps_within_color():
+    """The Okey is the next number of the indicator's color, 13 wrapping to 1."""
+    assert OKEY_FOR_INDICATOR[0] == 1
+    assert OKEY_FOR_INDICATOR[12] == 0
+    assert OKEY_FOR_INDICATOR[25] == 13
+    assert OKEY_FOR_INDICATOR[51] == 39
+
+
+def test_vectorized_tile_lookups_match_scalar_helpers():
+    """Array lookups agree with ``get_color``, ``get_number`` and the okey table."""
+    np = pytest.importorskip('numpy')
+    tiles = np.arange(FAKE_OKEY_INDEX + 1)
+    colors = tile_color_ids(tiles)
+    numbers = tile_numbers(tiles.reshape(1, -1))[0]
+    for t in range(FAKE_OKEY_INDEX + 1):
+        assert COLOR_NAMES[colors[t]] == get_color(t)
+        assert (numbers[t] or None) == get_number(t)
+    assert okeys_for(tiles[:FAKE_OKEY_INDEX]).tolist() == list(OKEY_FOR_INDICATOR[:FAKE_OKEY_INDEX])
+
+
+def test_deal_batch_shapes_and_integrity():
+    """Batch deals use each tile at most twice and pad the 14-tile seats."""
+    np = pytest.importorskip('numpy')
+    hands, indicators, okeys = deal_batch(200, np.random.default_rng(0))
+    assert hands.shape == (200, 4, 15) and hands.dtype == np.uint8
+    assert (indicators != FAKE_OKEY_INDEX).all()
+    assert okeys.tolist() == [OKEY_FOR_INDICATOR[i] for i in indicators]
+    assert (hands[:, 0] != PAD_TILE).all()
+    assert (hands[:, 1:, 14] == PAD_TILE).all()
+    for game in range(200):
+        dealt = hands[game][hands[game] != PAD_TILE].tolist() + [int(indicators[game])]
+        assert len(dealt) == sum(TILES_PER_PLAYER) + 1
+        assert max(dealt.count(t) for t in set(dealt)) <= 2
+
+
+def test_deal_batch_fake_okey_positions_are_uniform():
+    """Every dealt slot holds a fake Okey about 2 times in 105."""
+    np = pytest.importorskip('numpy')
+    hands, _, _ = deal_batch(50_000, np.random.default_rng(3))
+    dealt = np.concatenate([hands[:, seat, :count] for seat, count in enumerate(TILES_PER_PLAYER)], axis=1)
+    frequency = (dealt == FAKE_OKEY_INDEX).mean(axis=0)
+    assert np.abs(frequency - 2 / 105).max() < 0.004
+
+
+def test_rng_streams_replay_games():
+    """The same stream key replays a deal exactly; other keys differ."""
+    streams = RngStreams(1234)
+
+    def deal(key):
+        rng = streams.stream(*key)
+        deck = generate_tiles()
+        indicator, okey = select_indicator_and_okey(deck, rng)
+        deck.remove(indicator)
+        return indicator, okey, distribute_tiles(deck, rng)
+
+    assert deal((7,)) == deal((7,))
+    assert deal((7,)) != deal((8,))
+    assert RngStreams(1234).stream(3).random() == streams.stream(3).random()
+    with pytest.raises(ValueError):
+        RngStreams(-1)
+
+
+def test_simulate_is_independent_of_worker_count():
+    """Seeded runs give identical aggregates in-process and across a pool."""
+    single = simulate(60, workers=1, seed=42, chunk_size=25)
+    pooled = simulate(60, workers=2, seed=42, chunk_size=25)
+    assert single.games == 60 and sum(single.stats.wins) == 60
+    assert single.stats.to_dict() == pooled.stats.to_dict()
+    game = play_game(42, 5)
+    assert game == play_game(42, 5)
+    assert game.scores[game.winner] == min(game.scores)
+
+
+def test_simulation_stats_merge_and_round_trip(tmp_path):
+    """Merged accumulators match one filled with all games; save/load is lossless."""
+    games = [play_game(1, i) for i in range(30)]
+    whole = SimulationStats()
+    first, second = SimulationStats(), SimulationStats()
+    for i, game in enumerate(games):
+        whole.update(game)
+        (first if i < 12 else second).update(game)
+    merged = first.merge(second)
+    assert merged.games == whole.games == 30
+    assert merged.wins == whole.wins
+    assert merged.seat_histograms == whole.seat_histograms
+    assert merged.color_histograms == whole.color_histograms
+    for seat in range(4):
+        assert merged.means[seat] == pytest.approx(whole.means[seat])
+        assert merged.variance(seat) == pytest.approx(whole.variance(seat))
+        scores = [g.scores[seat] for g in games]
+        assert whole.means[seat] == pytest.approx(sum(scores) / 30)
+
+    path = str(tmp_path / 'stats.json')
+    merged.save(path)
+    assert SimulationStats.load(path).to_dict() == merged.to_dict()
+
+
+def test_simulate_stops_once_intervals_are_narrow():
+    """A sequential run stops early when every metric is precise enough."""
+    metrics = [mean_leftover(1), win_probability(0)]
+    result = simulate(5000, seed=2, chunk_size=50, target_width=0.5, metrics=metrics, min_games=100)
+    assert result.converged
+    assert 100 <= result.games < 5000 and result.games % 50 == 0
+    for metric in metrics:
+        low, high = metric.interval(result.stats)
+        assert high - low <= 0.5
+
+    capped = simulate(100, seed=2, chunk_size=50, target_width=1e-6, metrics=metrics)
+    assert not capped.converged and capped.games == 100
+
+
+def test_intervals_stay_open_without_observed_variation():
+    """A seat that never won, or never varied, does not get a zero-width interval."""
+    stats = SimulationStats()
+    stats.games = 200
+    stats.wins = [200, 0, 0, 0]
+    stats.means = [3.0, 5.0, 5.0, 5.0]
+    for metric in (win_probability(0), win_probability(1), mean_leftover(1)):
+        low, high = metric.interval(stats)
+        assert high - low > 0.01, metric.name
+    low, high = win_probability(1).interval(stats)
+    assert low == pytest.approx(0.0, abs=1e-12) and high < 0.05
+    assert win_probability(1).interval(SimulationStats()) == (0.0, 1.0)
+
+
+def test_simulate_resumes_from_checkpoint(tmp_path, monkeypatch):
+    """A run interrupted mid-way resumes to bit-identical statistics."""
+    path = str(tmp_path / 'run.json')
+    expected = simulate(120, seed=9, chunk_size=20)
+
+    real_chunk = okey_game_simulation._simulate_chunk
+    calls = []
+
+    def crashing_chunk(task):
+        calls.append(task)
+        if len(calls) == 4:
+            raise RuntimeError("preempted")
+        return real_chunk(task)
+
+    monkeypatch.setattr(okey_game_simulation, '_simulate_chunk', crashing_chunk)
+    with pytest.raises(RuntimeError):
+        simulate(120, seed=9, chunk_size=20, checkpoint=path, checkpoint_every=1)
+    monkeypatch.setattr(okey_game_simulation, '_simulate_chunk', real_chunk)
+
+    resumed = simulate(120, seed=9, chunk_size=20, checkpoint=path, resume=True)
+    assert resumed.stats.to_dict() == expected.stats.to_dict()
+    with pytest.raises(ValueError):
+        simulate(120, seed=10, chunk_size=20, checkpoint=path, resume=True)
+
+
+def test_simulate_resume_checks_stopping_rule(tmp_path):
+    """A converged checkpoint is only reused with the same stopping rule."""
+    path = str(tmp_path / 'run.json')
+    metrics = [mean_leftover(1)]
+    first = simulate(5000, seed=2, chunk_size=50, target_width=0.5, metrics=metrics, checkpoint=path)
+    assert first.converged
+    again = simulate(5000, seed=2, chunk_size=50, target_width=0.5, metrics=metrics, checkpoint=path, resume=True)
+    assert again.converged and again.stats.to_dict() == first.stats.to_dict()
+    with pytest.raises(ValueError):
+        simulate(5000, seed=2, chunk_size=50, target_width=0.01, metrics=metrics, checkpoint=path, resume=True)
+    with pytest.raises(ValueError):
+        simulate(5000, seed=2, chunk_size=50, checkpoint=path, resume=True)
+
+
+def test_cli_score_and_deal(capsys):
+    """The CLI scores hands and replays seeded deals as JSON."""
+    assert main(['--format', 'json', 'score', '0', '1', '2', '13', '13', '--okey', '52', '--indicator', '1']) == 0
+    assert json.loads(capsys.readouterr().out) == {'leftover': 2}
+
+    main(['--format', 'json', 'deal', '--seed', '5'])
+    first = json.loads(capsys.readouterr().out)
+    main(['--format', 'json', 'deal', '--seed', '5'])
+    assert json.loads(capsys.readouterr().out) == first
+    assert first['scores'][first['winner'] - 1] == min(first['scores'])
+    for args in (['60', '1', '2', '--okey', '1', '--indicator', '0'], ['1', '2', '--okey', '99', '--indicator', '0']):
+        with pytest.raises(SystemExit):
+            main(['score'] + args)
+
+
+def test_cli_simulate_reports_metrics(capsys):
+    """``simulate`` accepts metrics and prints a summary."""
+    main(['--format', 'json', 'simulate', '--games', '40', '--chunk-size', '20', '--metric', 'win_probability:1'])
+    output = json.loads(capsys.readouterr().out)
+    assert output['games'] == 40
+    assert set(output['intervals']) == {'win_probability:1'}
+    with pytest.raises(SystemExit):
+        main(['simulate', '--games', '10', '--metric', 'bogus:9'])
+
+
+def test_logging_is_opt_in_and_sampled(caplog):
+    """Importing configures no logging and ``log_every`` logs one game in K."""
+    code = "import logging, okey_game_simulation; assert not logging.getLogger().handlers"
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+
+    with caplog.at_level(logging.WARNING, logger='okey_game_simulation'):
+        simulate(10, chunk_size=5, log_every=1)
+    assert not caplog.records
+
+    with caplog.at_level(logging.INFO, logger='okey_game_simulation'):
+        simulate(10, chunk_size=5, log_every=4)
+    games = [r.getMessage() for r in caplog.records if r.getMessage().startswith('Game ')]
+    assert [g.split(':')[0] for g in games] == ['Game 0', 'Game 4', 'Game 8']